@@ -0,0 +1,118 @@
+# Host-side check and benchmark of the OLED frame packing.
+# Run from the CarCode folder:  python bench_display.py
+import os
+import sys
+import time
+from PIL import Image, ImageSequence, ImageOps
+from drive import config, framebuf
+from drive.SSD1305 import SSD1305, OLED_WIDTH, OLED_HEIGHT, OLED_COLUMN_OFFSET
+from drive.fakebus import RecordingSpiDev
+
+FACES_DIR = "./ReactionGifs"
+
+def load_frames(path):
+    # Same compositing and dithering the FaceManager does before display
+    im = Image.open(path)
+    bg = Image.new("RGBA", im.size, (0,0,0,0))
+    frames = []
+    for raw in ImageSequence.Iterator(im):
+        fr = bg.copy()
+        fr.alpha_composite(raw.convert("RGBA"))
+        img = fr
+        if img.size != (OLED_WIDTH, OLED_HEIGHT):
+            img = ImageOps.fit(img, (OLED_WIDTH, OLED_HEIGHT), method=Image.BICUBIC)
+        frames.append(img.convert('L').convert('1'))
+        bg = fr
+    return frames
+
+class RecordingPi(config.RaspberryPi):
+    """SPI wiring with the bus replaced by a RecordingSpiDev and no GPIO"""
+    def __init__(self):
+        super().__init__(spi=RecordingSpiDev(), device=config.Device_SPI)
+
+    def gpio_mode(self, Pin, Mode):
+        return Pin
+
+    def digital_write(self, Pin, value):
+        pass
+
+def check_transfers(buf):
+    """A full refresh is one 3-byte command and one page-sized data transfer per page."""
+    disp = SSD1305(rpi=RecordingPi())
+    spi = disp.RPI.spi
+    disp.loadbuffer(buf)
+    disp.ShowImage(force_full=True)
+    expected = []
+    for page in range(OLED_HEIGHT // 8):
+        expected.append(bytes([0xB0 + page, OLED_COLUMN_OFFSET & 0x0F, 0x10 | (OLED_COLUMN_OFFSET >> 4)]))
+        expected.append(bytes(buf[page*OLED_WIDTH:(page+1)*OLED_WIDTH]))
+    if spi.transfers != expected:
+        print(f"TRANSFER MISMATCH: {[len(t) for t in spi.transfers]}")
+        return False
+    print(f"transfers: {len(spi.transfers)} per full refresh, {spi.bytes_written} bytes")
+    return True
+
+def fps(fn, frames, seconds=1.0):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for img in frames:
+            fn(img)
+        count += len(frames)
+    return count / (time.perf_counter() - start)
+
+def traffic(buffers):
+    """Bytes ShowImage puts on the SPI bus for full refreshes vs. dirty-region
+    updates, playing the buffers once in order."""
+    out = []
+    for force in (True, False):
+        disp = SSD1305(rpi=RecordingPi())
+        for buf in buffers:
+            disp.loadbuffer(buf)
+            disp.ShowImage(force_full=force)
+        out.append(disp.RPI.spi.bytes_written)
+    return tuple(out)
+
+def check_clear():
+    """clear() blanks the panel even right after a frame was shown."""
+    disp = SSD1305(rpi=RecordingPi())
+    disp.loadbuffer(b"\xff" * (OLED_WIDTH * OLED_HEIGHT // 8))
+    disp.ShowImage()
+    disp.RPI.spi.reset()
+    disp.clear()
+    data = disp.RPI.spi.transfers[1::2]
+    if not data or any(data_byte for t in data for data_byte in t):
+        print("CLEAR MISMATCH: panel not blanked")
+        return False
+    return True
+
+def main():
+    frames = []
+    mismatches = 0
+    total_full = total_delta = 0
+    for name in sorted(os.listdir(FACES_DIR)):
+        if not name.lower().endswith(".gif"):
+            continue
+        gif = load_frames(os.path.join(FACES_DIR, name))
+        for i, img in enumerate(gif):
+            if framebuf.pack(img) != framebuf.pack_pixels(img):
+                print(f"MISMATCH {name} frame {i}")
+                mismatches += 1
+        full, delta = traffic([framebuf.pack(img) for img in gif])
+        total_full += full
+        total_delta += delta
+        print(f"{name}: {len(gif)} frames checked, {full} bytes full, {delta} bytes delta")
+        frames.extend(gif)
+
+    if not check_transfers(framebuf.pack(frames[0])):
+        mismatches += 1
+    if not check_clear():
+        mismatches += 1
+    print(f"traffic: {total_full} bytes full, {total_delta} bytes delta "
+          f"({100.0 * total_delta / total_full:.1f}%)")
+    print(f"pack_pixels: {fps(framebuf.pack_pixels, frames):8.1f} frames/s")
+    print(f"pack:        {fps(framebuf.pack, frames):8.1f} frames/s")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# Loopback benchmark of the command protocol: one connection per command
+# (legacy) vs. one keep-alive session. Hardware calls are replaced with
+# no-ops so only the network path is measured.
+# Run from the CarCode folder:  python bench_link.py [count]
+import os
+import sys
+import socket
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ComputerCode"))
+import car_agent
+import car_link
+
+class NullHW:
+    def happy(self, trace_id=None): pass
+    def sad(self, trace_id=None): pass
+    def idle(self): pass
+
+def start_server():
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(("127.0.0.1", 0))
+    s.listen(64)
+    def accept_loop():
+        while True:
+            conn, addr = s.accept()
+            threading.Thread(target=car_agent.client_thread, args=(conn, addr), daemon=True).start()
+    threading.Thread(target=accept_loop, daemon=True).start()
+    return s.getsockname()[1]
+
+def one_shot(port, event):
+    # Legacy client, but waiting for the reply so latency is comparable
+    with socket.create_connection(("127.0.0.1", port), timeout=2) as s:
+        s.sendall(f"{car_agent.SHARED_TOKEN}:{event}\n".encode())
+        return s.makefile("rb").readline().decode().strip()
+
+def run(label, send, count):
+    lat = []
+    start = time.perf_counter()
+    for _ in range(count):
+        t = time.perf_counter()
+        reply = send("PING")
+        lat.append(time.perf_counter() - t)
+        if reply != "PONG":
+            raise RuntimeError(f"{label}: unexpected reply {reply!r}")
+    total = time.perf_counter() - start
+    lat.sort()
+    p50 = lat[len(lat) // 2] * 1000
+    p99 = lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1000
+    print(f"{label:10s} {count / total:8.0f} cmd/s  p50 {p50:.3f} ms  p99 {p99:.3f} ms")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    car_agent.HW = NullHW()
+    port = start_server()
+    run("one-shot", lambda e: one_shot(port, e), count)
+    conn = car_link.CarConnection("127.0.0.1", port, token=car_agent.SHARED_TOKEN, timeout=2)
+    conn.refresh_address()   # what CarMonitor does before the first reaction
+    run("session", conn.send, count)
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# CPU cost of logging during a full happy() choreography on the simulated
+# hardware (hardware.SimBackend), with the log level at debug, info and off.
+# Records are written by carlog's thread to a file in the current folder, as
+# they would be to the SD card on the car. Also times one log call on its own.
+# Run from the CarCode folder:  python bench_logging.py [--rounds N] [--log FILE]
+import argparse
+import os
+import time
+import car_agent
+import carlog
+import hardware
+from bench_reactions import reaction
+
+LEVELS = ("debug", "info", "off")
+
+def call_cost(level, n=100000):
+    # ns per log_hw.debug call with two args, formatting included when it's recorded
+    carlog.set_level(level)
+    log = carlog.get("bench")
+    t = time.perf_counter()
+    for i in range(n):
+        log.debug("Steering to %dus (%s)", i, level)
+    return (time.perf_counter() - t) / n * 1e9
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--log", default="bench_logging.log", help="file the log thread writes to")
+    args = parser.parse_args()
+
+    with open(args.log, "w") as sink:
+        carlog.RING.sink = sink
+        carlog.RING.start()
+        backend = hardware.SimBackend()
+        hw = car_agent.CarHW(backend)
+        results = {}
+        for level in LEVELS:
+            carlog.set_level(level)
+            runs = []
+            for _ in range(args.rounds):
+                records, dropped = carlog.RING.records, carlog.RING.dropped
+                r = reaction(hw, backend, "happy")
+                r["records"] = carlog.RING.records - records
+                r["dropped_records"] = carlog.RING.dropped - dropped
+                runs.append(r)
+            results[level] = runs
+        carlog.set_level("off")
+        hw.cleanup()
+        hw.runner._t.join(1.0)
+        carlog.RING.flush()
+        costs = {level: call_cost(level) for level in LEVELS}
+        carlog.RING.stop()
+
+    print(f"happy() x {args.rounds} per level, log written to {args.log} ({os.path.getsize(args.log)} bytes)")
+    for level, runs in results.items():
+        cpu = sorted(r["cpu_s"] for r in runs)[len(runs) // 2]
+        wall = sorted(r["wall_s"] for r in runs)[len(runs) // 2]
+        late = max(r["late_max_ms"] for r in runs)
+        print(f"  {level:5s}  CPU {cpu * 1000:7.1f} ms of {wall:.2f} s ({100 * cpu / wall:.2f}%)  "
+              f"late max {late:5.1f} ms  records {runs[-1]['records']:4d}  dropped {sum(r['dropped_records'] for r in runs)}")
+    print("one disabled/enabled debug call: "
+          + "  ".join(f"{level} {ns:.0f} ns" for level, ns in costs.items()))
+
+if __name__ == "__main__":
+    main()
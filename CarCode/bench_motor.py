@@ -0,0 +1,73 @@
+# Motor PWM drivers on the simulated hardware (hardware.SimBackend): checks
+# that the pigpio driver's waveforms ramp to the requested duty and hold it,
+# then compares CPU use of a happy() reaction and of sitting idle with the
+# motor stopped, for pigpio DMA waveforms vs RPi.GPIO-style software PWM.
+# Run from the CarCode folder:  python bench_motor.py [--rounds N] [--freq HZ] [--ramp S]
+import argparse
+import time
+import car_agent
+import hardware
+import motor
+from bench_reactions import reaction
+
+def check_waveforms(freq, ramp_s):
+    backend = hardware.SimBackend(realtime=False, pwm_threads=False)
+    pi = backend.pigpio()
+    drv = motor.PigpioMotor(pi, backend.pigpio_module, car_agent.PWM_A, freq, ramp_s)
+    steps = int(round(ramp_s * freq))
+    ok = True
+    for target in (50, 80, 30, 0):
+        start = drv.duty
+        drv.set(target)
+        time.sleep(ramp_s)   # let the modelled ramp finish, so the next one starts at target
+        _, once, loop = pi.tx or (None, [], [])
+        ramp = [round(d, 1) for d in hardware.wave_duty(once, car_agent.PWM_A, drv.period_us)]
+        steady = hardware.wave_duty(loop, car_agent.PWM_A, drv.period_us)
+        good = (len(ramp) == steps and abs(ramp[-1] - target) < 0.5
+                and ramp == sorted(ramp, reverse=target < start)
+                and (steady == [] if target == 0 else all(abs(d - target) < 0.5 for d in steady))
+                and (target > 0 or pi.levels.get(car_agent.PWM_A, 0) == 0))
+        ok = ok and good
+        print(f"  {start:4.0f}% -> {target:3d}%  ramp {ramp[:3]} .. {ramp[-2:]} ({len(ramp)} periods)  "
+              f"then {'holds ' + format(steady[0], '.0f') + '%' if steady else 'low'}  {'ok' if good else 'WRONG'}")
+    drv.close()
+    return ok
+
+def cpu_idle(seconds=2.0):
+    cpu0 = time.process_time()
+    time.sleep(seconds)
+    return (time.process_time() - cpu0) / seconds
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--freq", type=int, default=car_agent.PWM_FREQ, help="motor PWM frequency (Hz)")
+    parser.add_argument("--ramp", type=float, default=car_agent.MOTOR_RAMP_S, help="ramp time (s)")
+    args = parser.parse_args()
+    car_agent.PWM_FREQ = args.freq
+    car_agent.MOTOR_RAMP_S = args.ramp
+
+    print(f"pigpio waveforms at {args.freq} Hz, {args.ramp:g} s ramps")
+    if not check_waveforms(args.freq, args.ramp):
+        raise SystemExit("pigpio waveforms don't match the requested duty")
+
+    for driver in motor.MOTOR_DRIVERS:
+        backend = hardware.SimBackend()
+        hw = car_agent.CarHW(backend, driver)
+        runs = [reaction(hw, backend, "happy") for _ in range(args.rounds)]
+        hw.runner.stop()
+        hw.runner._t.join(1.0)
+        idle = cpu_idle()
+        jitter = ""
+        pwms = backend.GPIO.pwms
+        if pwms and pwms[0].periods:
+            periods = sorted(abs(p - 1.0 / args.freq) * 1000 for p in pwms[0].periods)
+            jitter = f"  soft PWM period error p50 {periods[len(periods) // 2]:.2f} ms, max {periods[-1]:.2f} ms"
+        hw.cleanup()
+        cpu = sum(r["cpu_s"] for r in runs) / len(runs)
+        wall = sum(r["wall_s"] for r in runs) / len(runs)
+        print(f"{driver:6s}  happy CPU {cpu * 1000:6.1f} ms ({100 * cpu / wall:.2f}%)  "
+              f"idle, motor stopped {100 * idle:.2f}%  pigpio calls {hw.pi.timer.calls}{jitter}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Frame rate, reaction latency and CPU cost of the car's behaviors on the
+# simulated hardware (hardware.SimBackend), so they can be measured on any
+# Linux box. Bus transfers take as long as they would at the given clock.
+# Run from the CarCode folder:  python bench_reactions.py [--bus spi|i2c] [--hz N] [--rounds N] [--motor pigpio|soft]
+import argparse
+import time
+import car_agent
+import hardware
+import motor as motors
+
+def frame_rate(hw, backend, seconds=1.0):
+    # Every face frame back to back, as fast as the bus allows
+    frames = [buf for name in sorted(hw.faces._gif_cache) for buf, _ in hw.faces.frames(name)]
+    timer = backend.bus_timer()
+    out = {}
+    for label, force in (("full", True), ("delta", False)):
+        busy, count = timer.busy_s, 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            for buf in frames:
+                hw.disp.loadbuffer(buf)
+                hw.disp.ShowImage(force_full=force)
+            count += len(frames)
+        elapsed = time.perf_counter() - start
+        out[label] = (count / elapsed, 1000 * (timer.busy_s - busy) / count)
+    return out
+
+def reaction(hw, backend, behavior):
+    # Enqueue to first motor/OLED activity, and CPU time until the behavior is over
+    while hw.runner.pending():
+        time.sleep(0.01)
+    time.sleep(0.3)  # let the idle animation start, as it would between questions
+    before = hw.last_timeline_stats
+    t0 = backend.clock()
+    cpu0 = time.process_time()
+    getattr(hw, behavior)()
+    while hw.last_timeline_stats is before:
+        time.sleep(0.005)
+    cpu = time.process_time() - cpu0
+    wall = backend.clock() - t0
+    motor = min((e for e in (backend.trace.first("pwm", "duty", t0), backend.trace.first("pigpio", "wave_chain", t0))
+                 if e is not None), default=None)
+    oled = backend.trace.first(None, "data", t0)
+    stats = hw.last_timeline_stats
+    return {
+        "motor_ms": 1000 * (motor[0] - t0) if motor else float("nan"),
+        "oled_ms": 1000 * (oled[0] - t0) if oled else float("nan"),
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "dropped": stats["dropped"],
+        "late_mean_ms": stats["late_mean_ms"],
+        "late_max_ms": stats["late_max_ms"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bus", choices=("spi", "i2c"), default="spi")
+    parser.add_argument("--hz", type=int, help="bus clock (default 1 MHz SPI / 400 kHz I2C)")
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--motor", choices=motors.MOTOR_DRIVERS, default=car_agent.MOTOR_DRIVER)
+    args = parser.parse_args()
+    kwargs = {"bus": args.bus}
+    if args.hz:
+        kwargs["spi_hz" if args.bus == "spi" else "i2c_hz"] = args.hz
+    backend = hardware.SimBackend(**kwargs)
+
+    hw = car_agent.CarHW(backend, args.motor)
+    fps = frame_rate(hw, backend)
+    results = [(behavior, reaction(hw, backend, behavior))
+               for _ in range(args.rounds) for behavior in ("happy", "sad")]
+    hw.cleanup()
+    hw.runner._t.join(1.0)
+
+    clock = args.hz or (backend.spi_hz if args.bus == "spi" else backend.i2c_hz)
+    print(f"OLED over {args.bus} at {clock / 1e6:g} MHz")
+    for label, (rate, bus_ms) in fps.items():
+        print(f"  {label:5s} refresh {rate:7.1f} frames/s  ({bus_ms:.2f} ms bus time per frame)")
+    for behavior, r in results:
+        print(f"{behavior:5s}  first motor {r['motor_ms']:6.2f} ms  first OLED write {r['oled_ms']:7.2f} ms  "
+              f"{r['wall_s']:.2f} s  CPU {r['cpu_s']:.3f} s ({100 * r['cpu_s'] / r['wall_s']:.1f}%)  "
+              f"dropped {r['dropped']}  late mean {r['late_mean_ms']:.1f} ms, max {r['late_max_ms']:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Load test of the command server: threaded vs. asyncio.
+# Each server runs in a child process with the hardware replaced by a fake,
+# then the parent opens many stalled connections and reports the child's
+# thread count, memory and how long a fresh PING takes to answer. Both servers
+# must also answer an unterminated command when the client hangs up or stalls.
+# Run from the CarCode folder:  python bench_server.py [stalled_clients]
+import sys
+import socket
+import subprocess
+import time
+
+PORT = 5105
+SESSION_IDLE_TIMEOUT = 3  # s, so the stalled-line check doesn't wait a minute
+
+class FakeRunner:
+    def pending(self):
+        return 0
+
+class FakeHW:
+    # Accepts behaviors instantly, like a car with nothing queued
+    runner = FakeRunner()
+    def happy(self, trace_id=None): pass
+    def sad(self, trace_id=None): pass
+    def idle(self): pass
+
+def child(mode, port):
+    import car_agent
+    car_agent.HW = FakeHW()
+    car_agent.MAX_CONNECTIONS = 10000
+    car_agent.SESSION_IDLE_TIMEOUT = SESSION_IDLE_TIMEOUT
+    if mode == "async":
+        car_agent.run_async_server("127.0.0.1", port)
+    else:
+        car_agent.run_threaded_server("127.0.0.1", port)
+
+def proc_status(pid):
+    fields = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            fields[key] = value.strip()
+    return fields
+
+def ping(port):
+    t = time.perf_counter()
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as s:
+        s.sendall(b"monstercookiebrownie:PING\n")
+        reply = s.makefile("rb").readline().strip()
+    return reply, (time.perf_counter() - t) * 1000
+
+def unterminated(port, hang_up):
+    # "PING" without a newline: answered at EOF, or once the connection times out
+    t = time.perf_counter()
+    with socket.create_connection(("127.0.0.1", port), timeout=10) as s:
+        s.sendall(b"monstercookiebrownie:PING")
+        if hang_up:
+            s.shutdown(socket.SHUT_WR)
+        reply = s.makefile("rb").readline().strip()
+    return reply, time.perf_counter() - t
+
+def run(mode, stalled):
+    p = subprocess.Popen([sys.executable, __file__, "--child", mode, str(PORT)])
+    try:
+        for _ in range(50):
+            try:
+                ping(PORT)
+                break
+            except OSError:
+                time.sleep(0.1)
+        for hang_up in (True, False):
+            reply, secs = unterminated(PORT, hang_up)
+            print(f"{mode:8s} unterminated PING, client {'hangs up' if hang_up else 'waits'}: "
+                  f"{reply.decode() or 'no reply'} after {secs:.2f} s")
+            if reply != b"PONG":
+                raise SystemExit(f"{mode} server dropped an unterminated command")
+        base = proc_status(p.pid)
+        clients = []
+        for _ in range(stalled):
+            s = socket.create_connection(("127.0.0.1", PORT))
+            s.sendall(b"monstercookiebrownie:PI")  # never finishes the line
+            clients.append(s)
+        time.sleep(0.5)
+        loaded = proc_status(p.pid)
+        reply, ms = ping(PORT)
+        print(f"{mode:8s} {stalled} stalled clients: threads {base['Threads']} -> {loaded['Threads']}, "
+              f"RSS {base['VmRSS']} -> {loaded['VmRSS']}, PING {reply.decode()} in {ms:.2f} ms")
+        for s in clients:
+            s.close()
+    finally:
+        p.kill()
+        p.wait()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], int(sys.argv[3]))
+    else:
+        stalled = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+        run("threaded", stalled)
+        run("async", stalled)
@@ -1,13 +1,20 @@
 import socket
+import asyncio
+import argparse
 import threading
 import time
 import os
 import random
-import queue
-import RPi.GPIO as GPIO
-import pigpio
+import heapq
+import pickle
+import hashlib
+from collections import OrderedDict
 from PIL import Image, ImageSequence, ImageOps
-from drive import SSD1305
+from drive import framebuf
+from timeline import Timeline, play as play_timeline
+import hardware
+import carlog
+import motor
 
 # ======== PINS / CONSTANTS ========
 IN1 = 22            # H-bridge input for motor direction
@@ -16,18 +23,68 @@ PWM_A = 4           # PWM pin for motor speed
 SERVO_PIN = 12      # BCM 12 for steering
 LED_PIN = 5         # LED Headlights
 PWM_FREQ = 100      # Hz for DC motor PWM
+MOTOR_DRIVER = "pigpio"  # "pigpio" (DMA waveforms with ramps) or "soft" (RPi.GPIO thread), see motor.py
+MOTOR_RAMP_S = 0.04  # s to ramp between speeds (pigpio driver), < the 0.05 s stops below; 0 = step changes
 FACES_DIR = "./ReactionGifs"
+FACE_CACHE_DIR = os.path.join(FACES_DIR, ".cache")  # compiled frame buffers
+FACE_CACHE_VERSION = 1  # bump when the compiled format or dithering changes
 FRAME_UPDATE = 0.08 # s for quick face animations
 IDLE_INTERVAL = 2.0  # seconds between idle actions
 FALLBACK_FRAME_MS = 80  # if GIF has no per-frame duration
 MAX_STEER_DEG = 15  # max servo angle either direction (degrees)
 
+# Behavior priorities (lower runs first and preempts higher)
+PRIO_REACTION = 0   # RIGHT / WRONG
+PRIO_FACE = 1       # FACE command
+PRIO_IDLE = 9       # idle animation, only when nothing is queued
+
+# ======== LOGGING ========
+# Records go to carlog's ring buffer and are written out by its thread (see
+# carlog.py); motor, steering, LED and frame details are DEBUG.
+LOG_LEVEL = "info"
+DUMP_RECORDS = 50   # records the DUMP command returns by default
+log_faces = carlog.get("FaceManager")
+log_runner = carlog.get("BehaviorRunner")
+log_hw = carlog.get("CarHW")
+log_cmd = carlog.get("Command")
+log_agent = carlog.get("AGENT")
+
+# ======== CHOREOGRAPHIES ========
+# (seconds, track, value) keyframes, see timeline.py. The face GIF and LED
+# flashing are added on top when the behavior is built.
+HAPPY_MOTION = [
+    # Left steer, forward, back
+    (0.00, "servo", 15), (0.00, "motor", 50),
+    (0.50, "motor", 0),
+    (0.55, "motor", -50),
+    (1.05, "motor", 0),
+    # Right steer, forward, back
+    (1.10, "servo", -15), (1.10, "motor", 50),
+    (1.60, "motor", 0),
+    (1.65, "motor", -50),
+    (2.15, "motor", 0),
+]
+HAPPY_END = 2.20    # settle time before centering
+HAPPY_FLASH = dict(times=10, on_s=0.05, off_s=0.05)
+
+SAD_MOTION = [
+    (0.00, "motor", -30),
+    (1.00, "motor", 0),
+    (1.05, "motor", 30),
+    (2.05, "motor", 0),
+]
+SAD_END = 2.10
+SAD_FLASH = dict(times=1, on_s=0.5, off_s=0.5)
+
 # ======== FACE MANAGER ========
 class FaceManager:
-    def __init__(self, disp):
+    def __init__(self, disp, clock=time.monotonic, sleep=None):
         self.disp = disp
         self.disp.Init()
-        self._gif_cache = {}  # {name: [(img, dt_sec), ...]}
+        self._clock = clock  # injectable so playback timing can be checked off the Pi
+        self._sleep = sleep  # None: real sleep, cut short by a cancel event
+        self._gif_cache = {}  # {name: [(buf, dt_sec), ...]} packed display buffers
+        self.last_play_stats = None  # timing of the most recent play_gif_blocking
         self.last_happy_face = None  # Track last happy face
         self.last_sad_face = None    # Track last sad face
 
@@ -51,13 +108,12 @@ class FaceManager:
         self.disp.getbuffer(img)
         self.disp.ShowImage()
 
-    def _ensure_gif(self, name):
-        if name in self._gif_cache:
-            return True
-        path = os.path.join(FACES_DIR, name)
-        if not os.path.isfile(path):
-            print(f"[FaceManager] GIF not found: {path}")
-            return False
+    def show_buffer(self, buf):
+        self.disp.loadbuffer(buf)
+        self.disp.ShowImage()
+
+    def _compile_gif(self, path):
+        # Decode, fit, dither and pack every frame once
         im = Image.open(path)
         bg = Image.new("RGBA", im.size, (0,0,0,0))
         frames = []
@@ -65,99 +121,268 @@ class FaceManager:
             fr = bg.copy()
             fr.alpha_composite(raw.convert("RGBA"))
             dur = raw.info.get("duration", FALLBACK_FRAME_MS) / 1000.0
-            frames.append((fr.copy(), max(0.001, dur)))
+            frames.append((framebuf.pack(self._prep(fr)), max(0.001, dur)))
             bg = fr
+        return frames
+
+    def _cache_path(self, path):
+        # Keyed by the GIF file and display geometry, so edits and other panels miss
+        st = os.stat(path)
+        key = f"{FACE_CACHE_VERSION}:{os.path.basename(path)}:{st.st_mtime_ns}:{st.st_size}:" \
+              f"{self.disp.width}x{self.disp.height}"
+        return os.path.join(FACE_CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + ".pkl")
+
+    def _load_compiled(self, cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log_faces.warning("Ignoring bad face cache %s: %s", cache_path, e)
+            return None
+
+    def _save_compiled(self, cache_path, frames):
+        try:
+            os.makedirs(FACE_CACHE_DIR, exist_ok=True)
+            tmp = cache_path + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(frames, f)
+            os.replace(tmp, cache_path)
+        except OSError as e:
+            log_faces.warning("Could not write face cache: %s", e)
+
+    def _ensure_gif(self, name):
+        if name in self._gif_cache:
+            return True
+        path = os.path.join(FACES_DIR, name)
+        if not os.path.isfile(path):
+            log_faces.error("GIF not found: %s", path)
+            return False
+        cache_path = self._cache_path(path)
+        frames = self._load_compiled(cache_path)
+        if frames is None:
+            frames = self._compile_gif(path)
+            if frames:
+                self._save_compiled(cache_path, frames)
         if frames:
             self._gif_cache[name] = frames
             return True
-        print(f"[FaceManager] Failed to load GIF: {name}")
+        log_faces.error("Failed to load GIF: %s", name)
         return False
 
-    def play_gif_blocking(self, name, repeat=1):
-        print(f"[FaceManager] Playing GIF: {name}, repeat={repeat}")
+    def apply(self, track, value):
+        # Timeline target for GIF-only timelines
+        self.show_buffer(value)
+
+    def play_gif_blocking(self, name, repeat=1, cancel=None):
+        """Play a GIF against absolute frame deadlines on the monotonic clock.
+
+        The frames are played as a timeline (see timeline.play): frame i is
+        due at start + the summed durations before it, so display time is not
+        added on top of each frame's duration, and a frame whose window has
+        already passed is dropped (the last frame is always shown).
+        Setting the optional cancel event stops playback before the next frame.
+        """
+        log_faces.debug("Playing GIF: %s, repeat=%s", name, repeat)
         if not self._ensure_gif(name):
-            print(f"[FaceManager] GIF not available: {name}")
+            log_faces.warning("GIF not available: %s", name)
+            return False
+        frames = self._gif_cache[name] * max(1, int(repeat))
+        stats = self.last_play_stats = play_timeline(Timeline(name).gif(frames), self, clock=self._clock,
+                                                     sleep=self._sleep, cancel=cancel)
+        if stats["cancelled"]:
+            log_faces.debug("Cancelled GIF: %s after %d frames", name, stats["applied"])
             return False
-        frames = self._gif_cache[name]
-        for _ in range(max(1, int(repeat))):
-            for img, dt in frames:
-                self.show_image(img)
-                time.sleep(dt)
-        print(f"[FaceManager] Finished playing GIF: {name}")
+        log_faces.debug("Finished playing GIF: %s (%.3fs of %.3fs, %d dropped, late mean %.1fms max %.1fms)",
+                        name, stats["elapsed_s"], stats["expected_s"], stats["dropped"],
+                        stats["late_mean_ms"], stats["late_max_ms"])
         return True
 
     def first_frame(self, name):
         if not self._ensure_gif(name):
-            print(f"[FaceManager] No first frame for GIF: {name}")
+            log_faces.warning("No first frame for GIF: %s", name)
             return None
         return self._gif_cache[name][0][0]
 
+    def frames(self, name):
+        if not self._ensure_gif(name):
+            log_faces.warning("No frames for GIF: %s", name)
+            return []
+        return self._gif_cache[name]
+
 # ======== BEHAVIOR RUNNER ========
 class BehaviorRunner:
+    """Runs behaviors one at a time on a single thread.
+
+    Jobs are taken by priority, then arrival order. A job enqueued with a key
+    is dropped while another job with that key is waiting or running, so a
+    burst of identical commands plays once. When a more urgent job arrives the
+    cancel event is set; the idle animation and GIF playback check it between
+    frames, so they give way almost immediately.
+    """
     def __init__(self, faces, car):
         self.faces = faces
         self.car = car
-        self.q = queue.Queue()
+        self._jobs = []      # heap of (priority, seq, key, fn)
+        self._keys = set()   # keys of waiting jobs, for coalescing
+        self._seq = 0
+        self._cv = threading.Condition()
+        self._running_prio = None
+        self._running_key = None
+        self.cancel = threading.Event()  # asks the running job to stop early
         self._stop = threading.Event()
         self._t = threading.Thread(target=self._loop, daemon=True)
         self._t.start()
 
     def stop(self):
-        print("[BehaviorRunner] Stopping...")
+        log_runner.info("Stopping...")
         self._stop.set()
-        self.q.put(None)
+        self.cancel.set()
+        with self._cv:
+            self._cv.notify()
+
+    def enqueue(self, fn, priority=PRIO_FACE, key=None):
+        with self._cv:
+            if key is not None and (key in self._keys or key == self._running_key):
+                log_runner.info("Coalescing duplicate behavior: %s", key)
+                return False
+            log_runner.debug("Enqueuing new behavior: %s", key)
+            heapq.heappush(self._jobs, (priority, self._seq, key, fn))
+            self._seq += 1
+            if key is not None:
+                self._keys.add(key)
+            if self._running_prio is not None and priority < self._running_prio:
+                self.cancel.set()
+            self._cv.notify()
+        return True
 
-    def enqueue(self, fn):
-        print("[BehaviorRunner] Enqueuing new behavior")
-        self.q.put(fn)
+    def pending(self):
+        with self._cv:
+            return len(self._jobs)
+
+    def clear(self):
+        """Drop every waiting job and ask the running one to stop"""
+        with self._cv:
+            dropped = len(self._jobs)
+            self._jobs.clear()
+            self._keys.clear()
+            if self._running_prio is not None:
+                self.cancel.set()
+        log_runner.info("Cleared %d pending behaviors", dropped)
+        return dropped
+
+    def _take(self, timeout):
+        # Next job, or None to idle; marks it as running while holding the lock
+        with self._cv:
+            if not self._jobs and not self._stop.is_set():
+                self._cv.wait(timeout)
+            if self._jobs:
+                prio, _, key, fn = heapq.heappop(self._jobs)
+                self._keys.discard(key)
+            else:
+                prio, key, fn = PRIO_IDLE, None, None
+            self._running_prio = prio
+            self._running_key = key
+            self.cancel.clear()
+            return fn
+
+    def _done(self):
+        with self._cv:
+            self._running_prio = None
+            self._running_key = None
 
     def _idle_once(self):
-        print("[BehaviorRunner] Performing idle cycle")
+        log_runner.debug("Performing idle cycle")
         first = self.faces.first_frame("Blink.gif")
         if first is not None:
-            self.faces.show_image(first)
-        time.sleep(IDLE_INTERVAL)
+            self.faces.show_buffer(first)
+        if self.cancel.wait(IDLE_INTERVAL):
+            return
 
-        if random.random() < 0.5:
-            played = self.faces.play_gif_blocking("Blink.gif", repeat=1)
-            if not played and first is not None:
-                self.faces.show_image(first)
-        else:
-            played = self.faces.play_gif_blocking("LeftRight.gif", repeat=1)
-            if not played and first is not None:
-                self.faces.show_image(first)
+        name = "Blink.gif" if random.random() < 0.5 else "LeftRight.gif"
+        self.faces.play_gif_blocking(name, repeat=1, cancel=self.cancel)
+        if self.cancel.is_set():
+            return
 
         if first is not None:
-            self.faces.show_image(first)
+            self.faces.show_buffer(first)
 
     def _loop(self):
-        print("[BehaviorRunner] Starting loop")
+        log_runner.info("Starting loop")
         first = self.faces.first_frame("Blink.gif")
         if first is not None:
-            self.faces.show_image(first)
+            self.faces.show_buffer(first)
 
         while not self._stop.is_set():
-            try:
-                job = self.q.get(timeout=0.1)
-            except queue.Empty:
-                self._idle_once()
-                continue
-
-            if job is None or self._stop.is_set():
-                print("[BehaviorRunner] Exiting loop")
+            job = self._take(timeout=0.1)
+            if self._stop.is_set():
+                log_runner.info("Exiting loop")
                 break
 
             try:
-                job()
+                if job is None:
+                    self._idle_once()
+                else:
+                    job()
             except Exception as e:
-                print(f"[BehaviorRunner] Job error: {e}")
+                log_runner.error("Job error: %s", e)
             finally:
-                self.q.task_done()
+                self._done()
+
+# ======== TRACING ========
+# The computer can tag a command with a trace id ("RIGHT |trace=1a2b3c4d t=...", see
+# split_trace). The car then notes when the line arrived, was parsed and queued, when
+# the behavior started, and when its first frame and motor command went out, and
+# reports them with "TRACE <id>". Untagged commands record nothing.
+TRACE_KEEP = 256    # traced commands remembered for TRACE queries
+
+class TraceMarks:
+    """time.time() of each step a traced command went through, by trace id"""
+    def __init__(self, keep=TRACE_KEEP):
+        self.keep = keep
+        self._marks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, trace_id, name, t=None):
+        # The first mark of a name wins (the first frame of a behavior, not the last)
+        if trace_id is None:
+            return
+        t = time.time() if t is None else t
+        with self._lock:
+            marks = self._marks.get(trace_id)
+            if marks is None:
+                marks = self._marks[trace_id] = {}
+                if len(self._marks) > self.keep:
+                    self._marks.popitem(last=False)
+            marks.setdefault(name, t)
+
+    def get(self, trace_id):
+        with self._lock:
+            return dict(self._marks.get(trace_id, {}))
+
+TRACE = TraceMarks()
+
+def split_trace(payload):
+    # "RIGHT |trace=1a2b3c4d t=1712.5" -> ("RIGHT", {"trace": "1a2b3c4d", "t": "1712.5"})
+    if " |" not in payload:
+        return payload, {}
+    cmd, _, meta = payload.partition(" |")
+    return cmd, dict(field.split("=", 1) for field in meta.split() if "=" in field)
+
+def trace_reply(trace_id):
+    # "TRACE <id> now=<t> recv=<t> ..." with "now" for the computer to line up the clocks
+    marks = TRACE.get(trace_id)
+    fields = " ".join(f"{name}={t:.6f}" for name, t in sorted(marks.items(), key=lambda m: m[1]))
+    return f"TRACE {trace_id} now={time.time():.6f} {fields}".rstrip()
 
 # ======== CAR HARDWARE MANAGER ========
 class CarHW:
-    def __init__(self):
-        print("[CarHW] Initializing hardware")
+    def __init__(self, backend=None, motor_driver=MOTOR_DRIVER):
+        # backend supplies GPIO, pigpio and the OLED: the Pi itself or a simulator (see hardware.py)
+        self.backend = backend or hardware.PiBackend()
+        log_hw.info("Initializing hardware (%s)", self.backend.name)
+        GPIO = self.GPIO = self.backend.gpio()
         GPIO.setmode(GPIO.BCM)
         GPIO.setwarnings(False)
 
@@ -168,269 +393,393 @@ class CarHW:
         GPIO.setup(IN1, GPIO.OUT, initial=GPIO.LOW)
         GPIO.setup(IN2, GPIO.OUT, initial=GPIO.LOW)
         GPIO.setup(PWM_A, GPIO.OUT)
-        self.power_a = GPIO.PWM(PWM_A, PWM_FREQ)
-        self.power_a.start(0)  # Start PWM at 0% duty cycle
+        self._direction = None    # (IN1, IN2) levels last set
 
-        # Servo via pigpio
-        self.pi = pigpio.pi()
+        # Servo (and the pigpio motor driver) via pigpio
+        self.pi = self.backend.pigpio()
         if not self.pi.connected:
-            print("[CarHW] ERROR: pigpio daemon not running")
+            log_hw.error("pigpio daemon not running")
             raise RuntimeError("pigpio daemon not running")
 
+        # Motor speed: PWM on PWM_A, starting at 0% duty cycle
+        self.motor = motor.make_motor(motor_driver, self.backend, GPIO, self.pi, PWM_A, PWM_FREQ, MOTOR_RAMP_S)
+
         # OLED faces
-        self.disp = SSD1305.SSD1305()
+        self.disp = self.backend.display()
         self.faces = FaceManager(self.disp)
 
         # Single behavior runner
+        self.last_timeline_stats = None
+        self._trace_id = None     # trace id of the behavior being performed (see TraceMarks)
         self.runner = BehaviorRunner(self.faces, self)
 
     # Servo motor (steering) helpers
     def angle_to_us(self, a_deg: float) -> int:
-        print(f"[CarHW] Converting angle {a_deg} to microseconds")
+        log_hw.debug("Converting angle %s to microseconds", a_deg)
         a_deg = max(-90, min(90, a_deg))
         return int(1500 + (a_deg / 90.0) * 1000)  # ~500–2500us
 
     def steer_us(self, usec: int):
-        print(f"[CarHW] Steering to {usec}us")
+        log_hw.debug("Steering to %dus", usec)
         self.pi.set_servo_pulsewidth(SERVO_PIN, int(usec))
 
     def steer_deg(self, degrees: float):
-        print(f"[CarHW] Steering to {degrees} degrees")
+        log_hw.debug("Steering to %s degrees", degrees)
         d = max(-MAX_STEER_DEG, min(MAX_STEER_DEG, float(degrees)))
         self.steer_us(self.angle_to_us(d))
 
     # Motor control helpers
     def forward(self, speed: int):
-        print(f"[CarHW] Motor forward at speed {speed}%")
-        speed = max(0, min(100, speed))  # Clamp speed to 0-100
-        GPIO.output(IN1, GPIO.HIGH)
-        GPIO.output(IN2, GPIO.LOW)
-        self.power_a.ChangeDutyCycle(speed)
+        log_hw.debug("Motor forward at speed %s%%", speed)
+        self._drive(self.GPIO.HIGH, self.GPIO.LOW, speed)
 
     def backward(self, speed: int):
-        print(f"[CarHW] Motor backward at speed {speed}%")
+        log_hw.debug("Motor backward at speed %s%%", speed)
+        self._drive(self.GPIO.LOW, self.GPIO.HIGH, speed)
+
+    def _drive(self, in1, in2, speed):
         speed = max(0, min(100, speed))  # Clamp speed to 0-100
-        GPIO.output(IN1, GPIO.LOW)
-        GPIO.output(IN2, GPIO.HIGH)
-        self.power_a.ChangeDutyCycle(speed)
+        if (in1, in2) != self._direction:
+            self.motor.set(0, ramp=False)  # never flip the H-bridge under power
+            self.GPIO.output(IN1, in1)
+            self.GPIO.output(IN2, in2)
+            self._direction = (in1, in2)
+        self.motor.set(speed)  # ramps there with the pigpio driver
 
     def stop(self):
-        print("[CarHW] Motor stopped")
-        GPIO.output(IN1, GPIO.LOW)
-        GPIO.output(IN2, GPIO.LOW)
-        self.power_a.ChangeDutyCycle(0)
+        log_hw.debug("Motor stopped")
+        self.motor.set(0)
+        if not self.motor.ramps:
+            # A ramping driver slows down on the current direction; it's released by _release_bridge
+            self._release_bridge()
+
+    def _release_bridge(self):
+        # Both H-bridge inputs low, so an idle car doesn't keep one side enabled
+        if self.motor.ramps and self.motor.current() > 0:
+            self.motor.set(0, ramp=False)  # cut short: a behavior was cancelled mid-ramp
+        self.GPIO.output(IN1, self.GPIO.LOW)
+        self.GPIO.output(IN2, self.GPIO.LOW)
+        self._direction = None
 
     def _stop_and_center(self):
-        print("[CarHW] Stopping motors and centering steering")
+        log_hw.debug("Stopping motors and centering steering")
         self.stop()  # Stop motors
+        self._release_bridge()
         self.steer_deg(0)  # Center steering
 
     # LED helpers
     def led_on(self):
-        print("[CarHW] LED on")
-        GPIO.output(LED_PIN, GPIO.HIGH)
+        log_hw.debug("LED on")
+        self.GPIO.output(LED_PIN, self.GPIO.HIGH)
 
     def led_off(self):
-        print("[CarHW] LED off")
-        GPIO.output(LED_PIN, GPIO.LOW)
-
-    def led_flash(self, times=6, on_ms=80, off_ms=80):
-        print(f"[CarHW] Flashing LED: {times} times, {on_ms}ms on, {off_ms}ms off")
-        for _ in range(max(1, int(times))):
-            GPIO.output(LED_PIN, GPIO.HIGH)
-            time.sleep(on_ms/1000.0)
-            GPIO.output(LED_PIN, GPIO.LOW)
-            time.sleep(off_ms/1000.0)
-            GPIO.output(LED_PIN, GPIO.HIGH)  # Return to default on
+        log_hw.debug("LED off")
+        self.GPIO.output(LED_PIN, self.GPIO.LOW)
+
+    # Timeline target: one call per keyframe (see timeline.py)
+    def apply(self, track, value):
+        if track == "oled":
+            self.faces.show_buffer(value)
+            if self._trace_id is not None:
+                TRACE.mark(self._trace_id, "first_frame")
+        elif track == "led":
+            self.GPIO.output(LED_PIN, self.GPIO.HIGH if value else self.GPIO.LOW)
+        elif track == "motor":
+            if value > 0:
+                self.forward(value)
+            elif value < 0:
+                self.backward(-value)
+            else:
+                self.stop()
+            if self._trace_id is not None:
+                TRACE.mark(self._trace_id, "first_motor")
+        elif track == "servo":
+            self.steer_deg(value)
+
+    def _perform(self, timeline, trace_id=None):
+        self._trace_id = trace_id
+        try:
+            self.last_timeline_stats = play_timeline(timeline, self, cancel=self.runner.cancel)
+        finally:
+            self._trace_id = None
+            self._stop_and_center()
+            self.led_on()  # Ensure LEDs are back on
+
+    def _enqueue_reaction(self, job, key, trace_id):
+        TRACE.mark(trace_id, "enqueue")
+        if not self.runner.enqueue(job, priority=PRIO_REACTION, key=key):
+            TRACE.mark(trace_id, "coalesced")
 
     # HAPPY behavior
-    def happy(self):
+    def happy(self, trace_id=None):
         def job():
-            print("[CarHW] Executing happy behavior")
+            TRACE.mark(trace_id, "dequeue")
+            log_hw.info("Executing happy behavior")
             happy_faces = ["Right-star.gif", "Right-slotmachine.gif"]
             choice = happy_faces[0] if self.faces.last_happy_face == happy_faces[1] else happy_faces[1]
             self.faces.last_happy_face = choice
 
-            def face_task():
-                self.faces.play_gif_blocking(choice, repeat=1)
-
-            def led_task():
-                self.led_flash(times=10, on_ms=50, off_ms=50)
-
-            def motor_task():
-                # Left steer, forward, back
-                self.steer_deg(15)
-                self.forward(50)
-                time.sleep(0.5)
-                self.stop()
-                time.sleep(0.05)  # Brief delay to stabilize
-                self.backward(50)
-                time.sleep(0.5)
-                self.stop()
-                time.sleep(0.05)
-                # Right steer, forward, back
-                self.steer_deg(-15)
-                self.forward(50)
-                time.sleep(0.5)
-                self.stop()
-                time.sleep(0.05)
-                self.backward(50)
-                time.sleep(0.5)
-                self.stop()
-                time.sleep(0.05)
-
-            # Run tasks concurrently
-            threads = [
-                threading.Thread(target=face_task),
-                threading.Thread(target=led_task),
-                threading.Thread(target=motor_task)
-            ]
-            for t in threads:
-                t.start()
-            for t in threads:
-                t.join()
-
-            self._stop_and_center()
-            self.led_on()  # Ensure LEDs are back on
-        self.runner.enqueue(job)
+            self._perform(Timeline("happy", end=HAPPY_END)
+                          .gif(self.faces.frames(choice))
+                          .flash(**HAPPY_FLASH)
+                          .keyframes(HAPPY_MOTION), trace_id)
+        self._enqueue_reaction(job, "RIGHT", trace_id)
 
     # SAD behavior
-    def sad(self):
+    def sad(self, trace_id=None):
         def job():
-            print("[CarHW] Executing sad behavior")
+            TRACE.mark(trace_id, "dequeue")
+            log_hw.info("Executing sad behavior")
             sad_faces = ["Wrong-Shake.gif", "Wrong-x.gif"]
             choice = sad_faces[0] if self.faces.last_sad_face == sad_faces[1] else sad_faces[1]
             self.faces.last_sad_face = choice
 
-            def face_task():
-                self.faces.play_gif_blocking(choice, repeat=1)
-
-            def led_task():
-                self.led_flash(times=1, on_ms=500, off_ms=500)
-
-            def motor_task():
-                self.backward(30)
-                time.sleep(1.0)
-                self.stop()
-                time.sleep(0.05)  # Brief delay to stabilize
-                self.forward(30)
-                time.sleep(1.0)
-                self.stop()
-                time.sleep(0.05)
-
-            # Run tasks concurrently
-            threads = [
-                threading.Thread(target=face_task),
-                threading.Thread(target=led_task),
-                threading.Thread(target=motor_task)
-            ]
-            for t in threads:
-                t.start()
-            for t in threads:
-                t.join()
-
-            self._stop_and_center()
-            self.led_on()  # Ensure LEDs are back on
-        self.runner.enqueue(job)
+            self._perform(Timeline("sad", end=SAD_END)
+                          .gif(self.faces.frames(choice))
+                          .flash(**SAD_FLASH)
+                          .keyframes(SAD_MOTION), trace_id)
+        self._enqueue_reaction(job, "WRONG", trace_id)
 
     def idle(self):
-        print("[CarHW] Clearing queue for idle behavior")
-        pass
+        log_hw.info("Clearing queue for idle behavior")
+        self.runner.clear()
 
     def cleanup(self):
-        print("[CarHW] Cleaning up")
+        log_hw.info("Cleaning up")
         self.runner.stop()
         self.faces.disp.clear()
         self.faces.disp.ShowImage()
         self.pi.set_servo_pulsewidth(SERVO_PIN, 0)
-        self.power_a.stop()  # Stop PWM
+        self.motor.close()  # Stop PWM
         self.led_off()
         self.pi.stop()
-        GPIO.cleanup()
-        print("[CarHW] Cleanup complete")
+        self.GPIO.cleanup()
+        log_hw.info("Cleanup complete")
 
 # ======== COMMAND SERVER ========
 HW = None
 
-def init_hardware():
+def init_hardware(backend=None, motor_driver=MOTOR_DRIVER):
     global HW
     if HW is None:
-        HW = CarHW()
+        HW = CarHW(backend, motor_driver)
     return HW
 
 HOST = "0.0.0.0"
 PORT = 5005
 SHARED_TOKEN = "monstercookiebrownie"
-
-def handle_command(cmd: str):
-    cmd = cmd.strip().upper()
-    print(f"[Command] Received: {cmd}")
+CONN_TIMEOUT = 5             # s to receive the first command on a connection
+SESSION_IDLE_TIMEOUT = 60    # s a persistent connection may sit idle
+MAX_LINE = 1024              # bytes allowed in one command line
+MAX_CONNECTIONS = 16         # async server: clients served at once, others get ERR BUSY
+MAX_PENDING_JOBS = 8         # async server: hold replies while this many behaviors wait
+QUEUED_COMMANDS = ("RIGHT", "WRONG", "FACE")
+POLL_COMMANDS = ("PING", "TRACE", "DUMP")  # sent by the computer every round, logged at DEBUG
+
+def handle_command(cmd: str, trace_id=None):
+    raw = cmd.strip()
+    cmd = raw.upper()
+    if cmd.split(" ", 1)[0] in POLL_COMMANDS:
+        log_cmd.debug("Received: %s", cmd)
+    else:
+        log_cmd.info("Received: %s", cmd)
     if cmd == "RIGHT":
-        HW.happy()
+        HW.happy(trace_id)
         return "OK RIGHT"
     elif cmd == "WRONG":
-        HW.sad()
+        HW.sad(trace_id)
         return "OK SAD"
     elif cmd == "IDLE":
         HW.idle()
         return "OK IDLE"
     elif cmd == "PING":
         return "PONG"
+    elif cmd.startswith("TRACE "):
+        return trace_reply(raw.split()[1])
+    elif cmd == "DUMP" or cmd.startswith("DUMP "):
+        return dump_reply(cmd.split()[1:])
     elif cmd.startswith("FACE "):
-        parts = cmd.split()
+        parts = raw.split()  # GIF names are case-sensitive
         name = parts[1] if len(parts) >= 2 else ""
         rep = int(parts[2]) if len(parts) >= 3 and parts[2].isdigit() else 1
         def job():
-            HW.faces.play_gif_blocking(name, repeat=rep)
-        HW.runner.enqueue(job)
+            HW.faces.play_gif_blocking(name, repeat=rep, cancel=HW.runner.cancel)
+        HW.runner.enqueue(job, priority=PRIO_FACE, key=f"FACE {name} {rep}")
         return "OK FACE"
     else:
-        print(f"[Command] Unknown command: {cmd}")
+        log_cmd.warning("Unknown command: %s", cmd)
         return "ERR UNKNOWN"
 
+def dump_reply(args):
+    # "DUMP [N]" -> the last N log records (any level) on one line: "DUMP <count> rec || rec ..."
+    n = int(args[0]) if args and args[0].isdigit() else DUMP_RECORDS
+    records = [r.replace("\n", " ") for r in carlog.RING.dump(n)]
+    return f"DUMP {len(records)} " + " || ".join(records)
+
+def handle_line(msg: str, received=None):
+    # "token:COMMAND" or "token:COMMAND |trace=<id> t=<sent>" -> reply, or None when the token is wrong
+    token, payload = "", msg
+    if ":" in msg:
+        token, payload = msg.split(":", 1)
+        token, payload = token.strip(), payload.strip()
+
+    if SHARED_TOKEN and token != SHARED_TOKEN:
+        return None
+    payload, meta = split_trace(payload)
+    trace_id = meta.get("trace")
+    if trace_id is not None:
+        TRACE.mark(trace_id, "recv", received)
+        TRACE.mark(trace_id, "parsed")
+    return handle_command(payload, trace_id)
+
+def _reply(conn, raw: bytes, received=None):
+    reply = handle_line(raw.decode("utf-8", errors="ignore").strip(), received)
+    if reply is None:
+        conn.sendall(b"ERR AUTH\n")
+        return False
+    conn.sendall((reply + "\n").encode("utf-8"))
+    return True
+
 def client_thread(conn, addr):
+    # A connection carries one or more newline-terminated commands and gets one
+    # reply line per command, in order. One-shot clients send a single line (or
+    # an unterminated one) and hang up; session clients keep the socket open.
     with conn:
-        conn.settimeout(5)
+        conn.settimeout(CONN_TIMEOUT)
         data = b""
         try:
             while True:
-                chunk = conn.recv(1024)
+                try:
+                    chunk = conn.recv(1024)
+                except socket.timeout:
+                    chunk = b""
+                received = time.time()
                 if not chunk:
+                    if data.strip():
+                        _reply(conn, data, received)
                     break
                 data += chunk
-                if b"\n" in data:
-                    break
-        except socket.timeout:
-            pass
-
-        msg = data.decode("utf-8", errors="ignore").strip()
-        token, payload = "", msg
-        if ":" in msg:
-            token, payload = msg.split(":", 1)
-            token, payload = token.strip(), payload.strip()
-
-        if SHARED_TOKEN and token != SHARED_TOKEN:
-            conn.sendall(b"ERR AUTH\n")
-            return
-
-        reply = handle_command(payload)
-        conn.sendall((reply + "\n").encode("utf-8"))
-
-def serve():
-    init_hardware()
+                while b"\n" in data:
+                    line, data = data.split(b"\n", 1)
+                    if line.strip() and not _reply(conn, line, received):
+                        return
+                if len(data) > MAX_LINE:
+                    log_agent.warning("Dropping %s: line too long", addr)
+                    return
+                conn.settimeout(SESSION_IDLE_TIMEOUT)
+        except OSError:
+            pass  # client hung up before reading its reply
+
+def run_threaded_server(host=HOST, port=PORT):
+    # One thread per connection
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        s.bind((HOST, PORT))
+        s.bind((host, port))
         s.listen(5)
-        print(f"[AGENT] Listening on {HOST}:{PORT}")
+        log_agent.info("Listening on %s:%s", host, port)
+        while True:
+            conn, addr = s.accept()
+            threading.Thread(target=client_thread, args=(conn, addr), daemon=True).start()
+
+def _queues_job(msg: str):
+    payload = msg.split(":", 1)[-1].strip().upper()
+    return payload.startswith(QUEUED_COMMANDS)
+
+async def _wait_for_room(deadline):
+    # Backpressure: don't accept another behavior while the runner is backed up
+    loop = asyncio.get_running_loop()
+    while HW.runner.pending() >= MAX_PENDING_JOBS:
+        if loop.time() >= deadline:
+            return False
+        await asyncio.sleep(0.05)
+    return True
+
+async def _async_reply(writer, raw: bytes, received, loop):
+    msg = raw.decode("utf-8", errors="ignore").strip()
+    if _queues_job(msg) and not await _wait_for_room(loop.time() + CONN_TIMEOUT):
+        writer.write(b"ERR BUSY\n")
+    else:
+        reply = handle_line(msg, received)
+        if reply is None:
+            writer.write(b"ERR AUTH\n")
+            await writer.drain()
+            return False
+        writer.write((reply + "\n").encode("utf-8"))
+    await writer.drain()
+    return True
+
+async def async_client(reader, writer, slots):
+    # Same framing and replies as client_thread, on the event loop
+    addr = writer.get_extra_info("peername")
+    if slots.locked():
+        log_agent.warning("Refusing %s: %d connections open", addr, MAX_CONNECTIONS)
+        writer.write(b"ERR BUSY\n")
+        writer.close()
+        return
+    loop = asyncio.get_running_loop()
+    async with slots:
+        timeout = CONN_TIMEOUT
+        data = b""
         try:
             while True:
-                conn, addr = s.accept()
-                threading.Thread(target=client_thread, args=(conn, addr), daemon=True).start()
-        except KeyboardInterrupt:
-            pass
+                try:
+                    chunk = await asyncio.wait_for(reader.read(1024), timeout)
+                except asyncio.TimeoutError:
+                    chunk = b""
+                received = time.time()
+                if not chunk:
+                    if data.strip():
+                        await _async_reply(writer, data, received, loop)
+                    break
+                data += chunk
+                while b"\n" in data:
+                    line, data = data.split(b"\n", 1)
+                    if line.strip() and not await _async_reply(writer, line, received, loop):
+                        return
+                if len(data) > MAX_LINE:
+                    log_agent.warning("Dropping %s: line too long", addr)
+                    break
+                timeout = SESSION_IDLE_TIMEOUT
+        except OSError:
+            pass  # client hung up before reading its reply
         finally:
-            HW.cleanup()
+            writer.close()
+
+async def _async_main(host, port):
+    slots = asyncio.Semaphore(MAX_CONNECTIONS)
+    server = await asyncio.start_server(lambda r, w: async_client(r, w, slots),
+                                        host, port, limit=MAX_LINE, reuse_address=True)
+    log_agent.info("Listening on %s:%s (asyncio)", host, port)
+    async with server:
+        await server.serve_forever()
+
+def run_async_server(host=HOST, port=PORT):
+    asyncio.run(_async_main(host, port))
+
+def serve(use_async=False, backend=None, motor_driver=MOTOR_DRIVER):
+    carlog.RING.start()
+    init_hardware(backend, motor_driver)
+    try:
+        if use_async:
+            run_async_server()
+        else:
+            run_threaded_server()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        HW.cleanup()
+        carlog.RING.stop()
 
 if __name__ == "__main__":
-    serve()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Toy car command agent")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="serve connections from one asyncio event loop instead of a thread each")
+    parser.add_argument("--hardware", choices=sorted(hardware.BACKENDS), default="pi",
+                        help="drive the real Pi hardware or the simulator (see hardware.py)")
+    parser.add_argument("--log-level", choices=list(carlog.LEVELS), default=LOG_LEVEL,
+                        help="lowest level recorded; debug adds every motor, LED and frame step")
+    parser.add_argument("--motor", choices=motor.MOTOR_DRIVERS, default=MOTOR_DRIVER,
+                        help="motor PWM: pigpio DMA waveforms with ramps, or RPi.GPIO software PWM")
+    args = parser.parse_args()
+    carlog.set_level(args.log_level)
+    serve(args.use_async, hardware.make_backend(args.hardware), args.motor)
@@ -0,0 +1,137 @@
+import collections
+import sys
+import threading
+import time
+
+# ======== LOGGING ========
+# Logging off the hot paths. A record is a tuple appended to a bounded ring
+# (deque appends are atomic, so no lock); the message is only formatted when
+# a background thread writes it out, or when the DUMP command asks for the
+# recent history. Records below the level are dropped after one comparison,
+# before any formatting or tuple is built.
+#
+#   log = carlog.get("CarHW")
+#   log.debug("Steering to %dus", usec)      # %-style args, formatted later
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": OFF}
+_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARN", ERROR: "ERROR"}
+
+LOG_CAPACITY = 2048       # records kept for DUMP
+LOG_FLUSH_S = 0.25        # how often the writer thread drains to the sink
+
+def format_record(record):
+    t, level, name, msg, args = record
+    if args:
+        try:
+            msg = msg % args
+        except (TypeError, ValueError):
+            msg = f"{msg} {args!r}"
+    stamp = time.strftime("%H:%M:%S", time.localtime(t))
+    return f"{stamp}.{int(t * 1000) % 1000:03d} {_NAMES.get(level, level)} [{name}] {msg}"
+
+class RingLog:
+    """Bounded in-memory log shared by every Logger, with a writer thread.
+
+    level is the lowest level recorded at all. The writer thread (start())
+    drains new records to sink every flush_s; without it, or with sink=None,
+    records only stay in the ring. If the writer falls more than capacity
+    records behind, the oldest unwritten ones are dropped and counted.
+    """
+    def __init__(self, level=INFO, capacity=LOG_CAPACITY, sink=sys.stdout,
+                 flush_s=LOG_FLUSH_S, clock=time.time):
+        self.level = level
+        self.sink = sink
+        self.flush_s = flush_s
+        self.clock = clock
+        self.records = 0    # emitted so far
+        self.dropped = 0
+        self._ring = collections.deque(maxlen=capacity)      # recent history, for dump()
+        self._pending = collections.deque(maxlen=capacity)   # not yet written to sink
+        self._stop = threading.Event()
+        self._t = None
+
+    def emit(self, level, name, msg, args):
+        record = (self.clock(), level, name, msg, args)
+        self.records += 1
+        self._ring.append(record)
+        if self.sink is not None:
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(record)
+
+    def dump(self, n=None, level=DEBUG):
+        """The last n records at or above level, formatted, oldest first."""
+        records = [r for r in list(self._ring) if r[1] >= level]
+        return [format_record(r) for r in records[-n if n else 0:]]
+
+    def flush(self):
+        if self.sink is None:
+            return
+        lines = []
+        while True:
+            try:
+                lines.append(format_record(self._pending.popleft()))
+            except IndexError:
+                break
+        if lines:
+            self.sink.write("\n".join(lines) + "\n")
+            self.sink.flush()
+
+    def start(self):
+        if self._t is None:
+            self._t = threading.Thread(target=self._loop, daemon=True)
+            self._t.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._t is not None:
+            self._t.join(1.0)
+            self._t = None
+        self.flush()
+
+    def _loop(self):
+        while not self._stop.wait(self.flush_s):
+            try:
+                self.flush()
+            except (OSError, ValueError):
+                pass  # sink closed; records stay in the ring
+
+class Logger:
+    """Named front end of a RingLog; a disabled call costs one comparison."""
+    def __init__(self, name, ring):
+        self.name = name
+        self.ring = ring
+
+    def debug(self, msg, *args):
+        if DEBUG >= self.ring.level:
+            self.ring.emit(DEBUG, self.name, msg, args)
+
+    def info(self, msg, *args):
+        if INFO >= self.ring.level:
+            self.ring.emit(INFO, self.name, msg, args)
+
+    def warning(self, msg, *args):
+        if WARNING >= self.ring.level:
+            self.ring.emit(WARNING, self.name, msg, args)
+
+    def error(self, msg, *args):
+        if ERROR >= self.ring.level:
+            self.ring.emit(ERROR, self.name, msg, args)
+
+RING = RingLog()
+_loggers = {}
+
+def get(name):
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers[name] = Logger(name, RING)
+    return logger
+
+def set_level(level):
+    RING.level = LEVELS[level] if isinstance(level, str) else level
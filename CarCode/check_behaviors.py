@@ -0,0 +1,147 @@
+# Timing checks of the car's behaviors on the simulated hardware
+# (hardware.SimBackend), no Pi needed. Playback runs on a ManualClock, so
+# timestamps are exact and nothing actually sleeps; the BehaviorRunner checks
+# run in real time against the command handler, as the server would call it.
+# Run from the CarCode folder:  python check_behaviors.py
+import sys
+import time
+import car_agent
+import hardware
+from timeline import ManualClock, RecordingTarget, Timeline, play
+
+failures = []
+
+def check(ok, what):
+    print(f"  {'ok  ' if ok else 'FAIL'}  {what}")
+    if not ok:
+        failures.append(what)
+
+def manual_faces():
+    clock = ManualClock()
+    backend = hardware.SimBackend(realtime=False, clock=clock, sleep=clock.sleep)
+    return car_agent.FaceManager(backend.display(), clock=clock, sleep=clock.sleep), clock
+
+# ======== GIF PLAYBACK ========
+def check_gif_timing():
+    print("GIF playback (play_gif_blocking)")
+    faces, clock = manual_faces()
+    for name in sorted(faces._gif_cache):
+        expected = 2 * sum(dt for _, dt in faces.frames(name))
+        start = clock()
+        faces.play_gif_blocking(name, repeat=2)
+        stats = faces.last_play_stats
+        check(abs(clock() - start - expected) < 1e-9 and stats["dropped"] == 0
+              and stats["applied"] == 2 * len(faces.frames(name)),
+              f"{name}: {clock() - start:.3f} s for {expected:.3f} s of frames, all shown")
+
+    # A display slower than the frame rate: frames are dropped, playback doesn't stretch
+    name = "Right-star.gif"
+    show = faces.disp.ShowImage
+    slow = 1.5 * max(dt for _, dt in faces.frames(name))
+    def slow_show(*args, **kwargs):
+        clock.sleep(slow)
+        show(*args, **kwargs)
+    faces.disp.ShowImage = slow_show
+    expected = sum(dt for _, dt in faces.frames(name))
+    start = clock()
+    faces.play_gif_blocking(name)
+    stats = faces.last_play_stats
+    faces.disp.ShowImage = show
+    check(stats["dropped"] > 0 and clock() - start <= expected + slow + 1e-9
+          and 0 < stats["late_mean_ms"] <= stats["late_p95_ms"] <= stats["late_max_ms"],
+          f"{name} at {slow * 1000:.0f} ms per frame: {stats['dropped']} dropped, "
+          f"{clock() - start:.3f} s for {expected:.3f} s of frames, "
+          f"late mean {stats['late_mean_ms']:.0f} ms, p95 {stats['late_p95_ms']:.0f} ms")
+
+# ======== CHOREOGRAPHIES ========
+def check_choreography(name, gif, flash, motion, end):
+    # Built as CarHW.happy / sad build them, played against a recording target
+    faces, clock = manual_faces()
+    timeline = (Timeline(name, end=end).gif(faces.frames(gif)).flash(**flash).keyframes(motion))
+    target = RecordingTarget(clock)
+    stats = play(timeline, target, clock=clock, sleep=clock.sleep)
+    moves = [e for e in target.trace if e[1] in ("motor", "servo")]
+    check(moves == [(t, track, value) for t, track, value in sorted(motion, key=lambda e: e[0])],
+          f"{name}: {len(moves)} motor/servo keyframes at their exact times")
+    led = [(t, value) for t, track, value in target.trace if track == "led"]
+    step = flash["on_s"] + flash["off_s"]
+    expected = [(i * step + (flash["on_s"] if i_off else 0.0), not i_off)
+                for i in range(flash["times"]) for i_off in (0, 1)] + [(flash["times"] * step, True)]
+    check(len(led) == len(expected) and all(abs(t - et) < 1e-9 and v == ev for (t, v), (et, ev) in zip(led, expected)),
+          f"{name}: LED flashes {flash['times']} times, back on at {expected[-1][0]:.2f} s")
+    motor = [(t, value) for t, track, value in sorted(motion, key=lambda e: e[0]) if track == "motor"]
+    gaps = [t1 - t0 for (t0, v0), (t1, v1) in zip(motor, motor[1:]) if v0 == 0]
+    check(all(gap > car_agent.MOTOR_RAMP_S for gap in gaps),
+          f"{name}: {car_agent.MOTOR_RAMP_S:g} s motor ramps fit the {min(gaps, default=0):.2f} s stops")
+    check(stats["elapsed_s"] == max(end, timeline.end) and stats["late_max_ms"] == 0.0,
+          f"{name}: lasts {stats['elapsed_s']:.2f} s, nothing late")
+
+def check_choreographies():
+    print("Choreographies (HAPPY_MOTION, SAD_MOTION)")
+    check_choreography("happy", "Right-star.gif", car_agent.HAPPY_FLASH, car_agent.HAPPY_MOTION, car_agent.HAPPY_END)
+    check_choreography("sad", "Wrong-x.gif", car_agent.SAD_FLASH, car_agent.SAD_MOTION, car_agent.SAD_END)
+
+# ======== BEHAVIOR RUNNER ========
+FLOOD = 50                  # commands fired back to back
+FIRST_FRAME_BOUND_MS = 100  # RIGHT received -> first frame of the happy face, under a flood
+
+def command(cmd, trace_id=None):
+    line = f"{car_agent.SHARED_TOKEN}:{cmd}" + (f" |trace={trace_id} t={time.time():.6f}" if trace_id else "")
+    return car_agent.handle_line(line)
+
+def wait_until(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return cond()
+
+def check_runner():
+    print("BehaviorRunner (priorities, coalescing, cancel)")
+    hw = car_agent.init_hardware(hardware.SimBackend())
+    performed = []
+    perform = hw._perform
+    def counting_perform(timeline, trace_id=None):
+        performed.append(timeline.name)
+        perform(timeline, trace_id)
+    hw._perform = counting_perform
+
+    # A burst of RIGHT plays once
+    replies = [command("RIGHT") for _ in range(FLOOD)]
+    wait_until(lambda: performed)
+    wait_until(lambda: not hw.runner.pending() and hw.runner._running_key is None, timeout=15.0)
+    check(all(r == "OK RIGHT" for r in replies) and performed == ["happy"],
+          f"{FLOOD} RIGHT in a row -> {len(performed)} happy")
+    pins = hw.GPIO.pins
+    check(pins.get(car_agent.IN1) == pins.get(car_agent.IN2) == hw.GPIO.LOW and hw.motor.duty == 0,
+          "after happy the motor is stopped and both H-bridge inputs are low")
+
+    # A long face is cut short by a reaction, which shows its first frame within the bound
+    command("FACE Right-slotmachine.gif 5")
+    wait_until(lambda: hw.runner._running_key is not None)
+    for i in range(FLOOD):
+        command(f"FACE Blink.gif {i + 1}")   # distinct keys, so none coalesce
+    command("RIGHT", "flood")
+    wait_until(lambda: "first_frame" in car_agent.TRACE.get("flood"))
+    marks = car_agent.TRACE.get("flood")
+    latency_ms = 1000 * (marks.get("first_frame", float("inf")) - marks["recv"])
+    check(hw.faces.last_play_stats["cancelled"], "running FACE cancelled by RIGHT")
+    check(latency_ms <= FIRST_FRAME_BOUND_MS,
+          f"RIGHT behind {FLOOD} queued FACE: first frame after {latency_ms:.1f} ms (bound {FIRST_FRAME_BOUND_MS} ms)")
+
+    # IDLE drops every queued FACE and stops the one playing
+    wait_until(lambda: hw.runner._running_key not in (None, "RIGHT"))
+    pending = hw.runner.pending()
+    check(command("IDLE") == "OK IDLE" and hw.runner.pending() == 0,
+          f"IDLE cleared {pending} queued behaviors")
+    check(wait_until(lambda: hw.runner._running_key is None, timeout=1.0), "IDLE stopped the running FACE")
+    hw.cleanup()
+
+def main():
+    check_gif_timing()
+    check_choreographies()
+    check_runner()
+    print(f"{len(failures)} failed" if failures else "all passed")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 #coding=utf-8
 from . import config
+from . import framebuf
 import time
 
 Device_SPI = config.Device_SPI
@@ -7,6 +8,7 @@ Device_I2C = config.Device_I2C
 
 OLED_WIDTH   = 128 #OLED width
 OLED_HEIGHT  = 32  #OLED height
+OLED_COLUMN_OFFSET = 4 #first controller column wired to the panel
 
 #******Rolling Direction******
 VERTICAL = True
@@ -22,14 +24,15 @@ SSD1305_VERTICAL_AND_RIGHT_HORIZONTAL_SCROLL = 0x29
 SSD1305_VERTICAL_AND_LEFT_HORIZONTAL_SCROLL = 0x2A
 
 class SSD1305(object):
-    def __init__(self):
+    def __init__(self, rpi=None):
         # Call base class constructor.
         self.width = OLED_WIDTH
         self.height = OLED_HEIGHT
         self._pages = self.height // 8
-        self._buffer = [0]*(self.width*self._pages)
+        self._buffer = bytearray(self.width*self._pages)
+        self._sent = None  # last buffer written to the panel, None if unknown
         #Initialize DC RST pin
-        self.RPI = config.RaspberryPi()
+        self.RPI = rpi if rpi is not None else config.RaspberryPi()
         self._dc = self.RPI.GPIO_DC_PIN
         self._rst = self.RPI.GPIO_RST_PIN
         self.Device = self.RPI.Device
@@ -41,12 +44,28 @@ class SSD1305(object):
         else:
             self.RPI.i2c_writebyte(0x00, cmd)
 
+    def commands(self, cmds):
+        """Send several command bytes in a single transfer"""
+        if(self.Device == Device_SPI):
+            self.RPI.digital_write(self._dc,False)
+            self.RPI.spi_writebytes(bytes(cmds))
+        else:
+            self.RPI.i2c_writeblock(0x00, bytes(cmds))
+
+    def data(self, buf):
+        """Send display data bytes in a single transfer"""
+        if(self.Device == Device_SPI):
+            self.RPI.digital_write(self._dc,True)
+            self.RPI.spi_writebytes(buf)
+        else:
+            self.RPI.i2c_writeblock(0x40, buf)
 
     def Init(self):
         if (self.RPI.module_init() != 0):
             return -1
         """Initialize dispaly"""    
         self.reset()
+        self._sent = None
 
         # 128x32 pixel specific initialization.
         self.command(0xAE)#--turn off oled panel
@@ -93,46 +112,34 @@ class SSD1305(object):
         if imwidth != self.width or imheight != self.height:
             raise ValueError('Image must be same dimensions as display ({0}x{1}).' \
                 .format(self.width, self.height))
-        # Grab all the pixels from the image, faster than getpixel.
-        pix = image.load()
-        # Iterate through the memory pages
-        index = 0
-        for page in range(self._pages):
-            # Iterate through all x axis columns.
-            for x in range(self.width):
-                # Set the bits for the column of pixels at the current position.
-                bits = 0
-                # Don't use range here as it's a bit slow
-                for bit in [0, 1, 2, 3, 4, 5, 6, 7]:
-                    bits = bits << 1
-                    bits |= 0 if pix[(x, page*8+7-bit)] == 0 else 1
-                # Update buffer byte and increment to next byte.
-                self._buffer[index] = bits
-                index += 1
+        self._buffer[:] = framebuf.pack(image)
+
+    def loadbuffer(self, buf):
+        """Set buffer to already packed display bytes (see framebuf.pack)"""
+        if len(buf) != len(self._buffer):
+            raise ValueError('Buffer must be {0} bytes.'.format(len(self._buffer)))
+        self._buffer[:] = buf
 
     
-    def ShowImage(self):
-        for page in range(0,self._pages):
-            # set page address #
-            self.command(0xB0 + page)
-            # set low column address #
-            self.command(0x04); 
-            # set high column address #
-            self.command(0x10); 
-            # write data #
-            # time.sleep(0.01)
-            if(self.Device == Device_SPI):
-                self.RPI.digital_write(self._dc,True)
-            for i in range(0,self.width):
-                if(self.Device == Device_SPI):
-                    # self.RPI.digital_write(self._dc,True)
-                    self.RPI.spi_writebyte([self._buffer[i+self.width*page]]); 
-                else :
-                    self.RPI.i2c_writebyte(0x40, self._buffer[i+self.width*page])
+    def ShowImage(self, force_full=False):
+        """Write the buffer to the panel.
+
+        Only the column range of each page that changed since the last call
+        is sent; force_full resends every page.
+        """
+        prev = None if force_full else self._sent
+        for page, start, end in framebuf.dirty_spans(prev, self._buffer, self.width):
+            column = OLED_COLUMN_OFFSET + start
+            # set page address, low and high column address #
+            self.commands([0xB0 + page, column & 0x0F, 0x10 | (column >> 4)])
+            # write the changed part of the page at once #
+            base = self.width*page
+            self.data(bytes(self._buffer[base+start:base+end]))
+        self._sent = bytes(self._buffer)
 
     def clear(self):
-        """Clear contents of image buffer"""
-        _buffer = [0xff]*(self.width * self.height//8)
+        """Clear contents of image buffer and blank the panel"""
+        self._buffer[:] = bytes(len(self._buffer))
         self.ShowImage()
     
     def SSD1305_Scrolling_Set(self):
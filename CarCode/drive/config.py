@@ -29,10 +29,9 @@
 
 
 import time
-from smbus import SMBus
-import spidev
 import ctypes
-from gpiozero import *
+# smbus, spidev and gpiozero are imported where the Pi hardware is opened, so
+# the driver can also run against simulated buses (see hardware.SimBackend)
 
 # Pin definition
 RST_PIN         = 25
@@ -41,18 +40,29 @@ DC_PIN          = 24
 Device_SPI = 1
 Device_I2C = 0
 
+I2C_BLOCK_MAX = 32
+
 class RaspberryPi:
-    def __init__(self,spi=spidev.SpiDev(0,0),spi_freq=40000000,rst = 27,dc = 25,bl = 18,bl_freq=1000,i2c=None):
+    def __init__(self,spi=None,spi_freq=1000000,rst = 27,dc = 25,bl = 18,bl_freq=1000,i2c=None,device=None):
         self.INPUT = False
         self.OUTPUT = True
+        self.spi_freq = spi_freq
         
-        if(Device_SPI == 1):
+        if device is None:
+            device = Device_SPI if Device_SPI == 1 else Device_I2C
+        if(device == Device_SPI):
             self.Device = Device_SPI
+            if spi is None:
+                import spidev
+                spi = spidev.SpiDev(0,0)
             self.spi = spi
         else :
             self.Device = Device_I2C
             self.address = 0x3c
-            self.bus = SMBus(1)
+            if i2c is None:
+                from smbus import SMBus
+                i2c = SMBus(1)
+            self.bus = i2c
         
         self.GPIO_RST_PIN = self.gpio_mode(RST_PIN,self.OUTPUT)
         self.GPIO_DC_PIN = self.gpio_mode(DC_PIN,self.OUTPUT)
@@ -62,12 +72,14 @@ class RaspberryPi:
         time.sleep(delaytime / 1000.0)
 
     def gpio_mode(self,Pin,Mode):
+        from gpiozero import DigitalOutputDevice, DigitalInputDevice
         if Mode:
             return DigitalOutputDevice(Pin,active_high = True,initial_value =False)
         else:
             return DigitalInputDevice(Pin,pull_up=None,active_state=True)
 
     def gpio_pwm(self,Pin):
+        from gpiozero import PWMOutputDevice
         return PWMOutputDevice(Pin,frequency = 10000)
 
     def set_pwm_Duty_cycle(self,Pin,value):
@@ -85,13 +97,22 @@ class RaspberryPi:
     def spi_writebyte(self,data):
         self.spi.writebytes([data[0]])
 
+    def spi_writebytes(self,data):
+        # One transfer for the whole buffer (writebytes2 takes bytes and splits >4096)
+        self.spi.writebytes2(data)
+
     def i2c_writebyte(self,reg, value):
         self.bus.write_byte_data(self.address, reg, value)
+
+    def i2c_writeblock(self,reg, data):
+        # SMBus block writes carry at most 32 bytes each
+        for i in range(0, len(data), I2C_BLOCK_MAX):
+            self.bus.write_i2c_block_data(self.address, reg, list(data[i:i+I2C_BLOCK_MAX]))
     
     def module_init(self): 
         self.digital_write(self.GPIO_RST_PIN,False)
         if(self.Device == Device_SPI):
-            self.spi.max_speed_hz = 1000000
+            self.spi.max_speed_hz = self.spi_freq
             self.spi.mode = 0b11  
         # CS_PIN.off()
         self.digital_write(self.GPIO_DC_PIN,False)
@@ -0,0 +1,119 @@
+# Stand-in for spidev.SpiDev that records every transfer instead of
+# touching the bus. Pass it as RaspberryPi(spi=RecordingSpiDev()) to see
+# how many transfers and bytes a display update costs.
+import time
+
+class RecordingSpiDev:
+    def __init__(self, bus=0, device=0):
+        self.bus = bus
+        self.device = device
+        self.max_speed_hz = 0
+        self.mode = 0
+        self.closed = False
+        self.transfers = []  # [bytes, ...] in the order they were written
+
+    def writebytes(self, data):
+        self.transfers.append(bytes(data))
+
+    def writebytes2(self, data):
+        self.transfers.append(bytes(data))
+
+    def xfer2(self, data):
+        self.transfers.append(bytes(data))
+        return [0] * len(data)
+
+    def close(self):
+        self.closed = True
+
+    @property
+    def bytes_written(self):
+        return sum(len(t) for t in self.transfers)
+
+    def reset(self):
+        self.transfers = []
+
+# ======== TIMED BUSES ========
+# Simulated buses that also take as long as the real ones would: a transfer
+# of n bytes occupies the bus for a fixed per-call overhead plus n * bits per
+# byte / clock. The caller is held until its transfer is done, like the
+# blocking spidev/smbus calls. Very short waits are carried over to the next
+# transfer instead of being slept one by one (time.sleep can't do 24 us).
+
+SPI_CALL_OVERHEAD_S = 20e-6   # ioctl + driver setup per transfer on a Pi Zero
+I2C_CALL_OVERHEAD_S = 50e-6
+MIN_SLEEP_S = 0.0005
+
+class BusTimer:
+    def __init__(self, hz, bits_per_byte=8, overhead_s=0.0, realtime=True, clock=None, sleep=None, trace=None, name="bus"):
+        self.hz = hz
+        self.bits_per_byte = bits_per_byte
+        self.overhead_s = overhead_s
+        self.realtime = realtime
+        self.clock = clock or time.monotonic
+        self.sleep = sleep or time.sleep
+        self.trace = trace      # callable trace(device, action, value) or None
+        self.name = name
+        self.busy_until = 0.0
+        self.busy_s = 0.0       # total modelled bus time
+        self.bytes = 0
+        self.calls = 0
+
+    def duration(self, nbytes):
+        return self.overhead_s + nbytes * self.bits_per_byte / float(self.hz)
+
+    def transfer(self, nbytes, action="write"):
+        dt = self.duration(nbytes)
+        now = self.clock()
+        self.busy_until = max(now, self.busy_until) + dt
+        self.busy_s += dt
+        self.bytes += nbytes
+        self.calls += 1
+        if self.trace is not None:
+            self.trace(self.name, action, nbytes)
+        if self.realtime:
+            owed = self.busy_until - self.clock()
+            if owed >= MIN_SLEEP_S:
+                self.sleep(owed)
+
+class TimedSpiDev(RecordingSpiDev):
+    """RecordingSpiDev whose transfers take as long as they would at max_speed_hz"""
+    def __init__(self, bus=0, device=0, realtime=True, clock=None, sleep=None, trace=None, keep=False):
+        super().__init__(bus, device)
+        self.keep = keep  # keep a copy of every transfer (memory grows with use)
+        self.timer = BusTimer(1000000, 8, SPI_CALL_OVERHEAD_S, realtime, clock, sleep, trace, "spi")
+
+    def write(self, data, action="write"):
+        if self.keep:
+            self.transfers.append(bytes(data))
+        self.timer.hz = self.max_speed_hz or self.timer.hz
+        self.timer.transfer(len(data), action)
+
+    def writebytes(self, data):
+        self.write(data)
+
+    def writebytes2(self, data):
+        self.write(data)
+
+    def xfer2(self, data):
+        self.write(data)
+        return [0] * len(data)
+
+    @property
+    def bytes_written(self):
+        return self.timer.bytes
+
+class TimedI2CBus:
+    """SMBus stand-in: each byte is 9 clocks (8 data + ACK), plus address and register bytes per call"""
+    def __init__(self, hz=400000, realtime=True, clock=None, sleep=None, trace=None):
+        self.timer = BusTimer(hz, 9, I2C_CALL_OVERHEAD_S, realtime, clock, sleep, trace, "i2c")
+        self.closed = False
+
+    def write_byte_data(self, addr, reg, value):
+        self.timer.transfer(3)
+
+    def write_i2c_block_data(self, addr, reg, data):
+        # the SSD1305 control byte tells commands (0x00) from display data (0x40)
+        self.timer.transfer(2 + len(data), "data" if reg == 0x40 else "cmd")
+
+    def close(self):
+        self.closed = True
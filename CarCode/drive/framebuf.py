@@ -0,0 +1,63 @@
+# Conversion of 1 bit PIL images into SSD1305 display memory.
+#
+# The controller stores the screen as pages of 8 pixel rows. Every byte is
+# one column of a page with the top pixel in the LSB, and pages follow each
+# other in memory, one display width at a time.
+from PIL import Image
+
+def pack(image):
+    """Pack a mode '1' image into page-ordered display bytes.
+
+    Rotating the image clockwise turns every display column into a row, so
+    tobytes() already packs the 8 pixels of a page into one byte with the
+    bottom pixel in the MSB. The rotated rows list the pages bottom-up, so
+    each page is picked out with a strided slice.
+    """
+    pages = image.height // 8
+    data = image.transpose(Image.ROTATE_270).tobytes()
+    return b"".join(data[pages-1-page::pages] for page in range(pages))
+
+def pack_pixels(image):
+    """Reference packing one pixel at a time, kept to check pack() against."""
+    width, height = image.size
+    # Grab all the pixels from the image, faster than getpixel.
+    pix = image.load()
+    buf = bytearray(width * (height // 8))
+    # Iterate through the memory pages
+    index = 0
+    for page in range(height // 8):
+        # Iterate through all x axis columns.
+        for x in range(width):
+            # Set the bits for the column of pixels at the current position.
+            bits = 0
+            # Don't use range here as it's a bit slow
+            for bit in [0, 1, 2, 3, 4, 5, 6, 7]:
+                bits = bits << 1
+                bits |= 0 if pix[(x, page*8+7-bit)] == 0 else 1
+            # Update buffer byte and increment to next byte.
+            buf[index] = bits
+            index += 1
+    return bytes(buf)
+
+def dirty_spans(prev, cur, width):
+    """Column ranges that differ between two packed frames.
+
+    Returns [(page, start, end), ...] with end exclusive, one range per page
+    that changed. With no previous frame every page is returned in full.
+    """
+    pages = len(cur) // width
+    if prev is None or len(prev) != len(cur):
+        return [(page, 0, width) for page in range(pages)]
+    spans = []
+    for page in range(pages):
+        base = page * width
+        if prev[base:base+width] == cur[base:base+width]:
+            continue
+        start = 0
+        while prev[base+start] == cur[base+start]:
+            start += 1
+        end = width
+        while prev[base+end-1] == cur[base+end-1]:
+            end -= 1
+        spans.append((page, start, end))
+    return spans
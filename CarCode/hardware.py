@@ -0,0 +1,354 @@
+import collections
+import threading
+import time
+from drive import SSD1305, config
+from drive.fakebus import BusTimer, TimedSpiDev, TimedI2CBus
+
+# ======== BACKENDS ========
+# CarHW gets its GPIO module, pigpio connection and OLED from a backend.
+# "pi" opens the real hardware; "sim" stands in for all of it, taking as
+# long as the buses would and recording every call in a trace, so the
+# reactions, display and server can be run and profiled on any Linux box.
+
+class PiBackend:
+    name = "pi"
+
+    def gpio(self):
+        import RPi.GPIO as GPIO
+        return GPIO
+
+    def pigpio(self):
+        return self.pigpio_module.pi()
+
+    @property
+    def pigpio_module(self):
+        import pigpio
+        return pigpio
+
+    def display(self):
+        return SSD1305.SSD1305()
+
+class SimBackend:
+    """Simulated car hardware.
+
+    bus picks how the OLED is wired ("spi" or "i2c"); spi_hz and i2c_hz are
+    the bus clocks the transfer times are computed from. pigpio_call_s is
+    the round trip of one pigpio call to the daemon. With realtime=False the
+    bus and call times are only added up, not waited for. pwm_threads runs
+    a thread per software PWM, waking at every edge as RPi.GPIO's does.
+    """
+    name = "sim"
+
+    def __init__(self, bus="spi", spi_hz=1000000, i2c_hz=400000, pigpio_call_s=100e-6,
+                 realtime=True, clock=time.monotonic, sleep=time.sleep, pwm_threads=True):
+        self.bus = bus
+        self.spi_hz = spi_hz
+        self.i2c_hz = i2c_hz
+        self.realtime = realtime
+        self.clock = clock
+        self.sleep = sleep
+        self.trace = HardwareTrace(clock)
+        self.GPIO = SimGPIO(self.trace, pwm_threads)
+        self.pigpio_module = SimPigpio(self.trace, pigpio_call_s, realtime, clock, sleep)
+        self.rpi = None
+
+    def gpio(self):
+        return self.GPIO
+
+    def pigpio(self):
+        return self.pigpio_module.pi()
+
+    def display(self):
+        self.rpi = SimRaspberryPi(self.trace, bus=self.bus, spi_hz=self.spi_hz, i2c_hz=self.i2c_hz,
+                                  realtime=self.realtime, clock=self.clock, sleep=self.sleep)
+        return SSD1305.SSD1305(rpi=self.rpi)
+
+    def bus_timer(self):
+        """BusTimer of the OLED bus (modelled busy time, bytes and calls)"""
+        return self.rpi.spi.timer if self.rpi.Device == config.Device_SPI else self.rpi.bus.timer
+
+BACKENDS = {"pi": PiBackend, "sim": SimBackend}
+
+def make_backend(name="pi", **kwargs):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown hardware backend: {name}")
+    return BACKENDS[name](**kwargs)
+
+# ======== TRACE ========
+class HardwareTrace:
+    """Time-stamped (t, device, action, value) record of every simulated hardware call"""
+    def __init__(self, clock=time.monotonic, limit=200000):
+        self.clock = clock
+        self.enabled = True
+        self.events = collections.deque(maxlen=limit)
+
+    def __call__(self, device, action, value=None):
+        if self.enabled:
+            self.events.append((self.clock(), device, action, value))
+
+    def clear(self):
+        self.events.clear()
+
+    def find(self, device=None, action=None, since=None):
+        return [e for e in list(self.events)
+                if (device is None or e[1] == device)
+                and (action is None or e[2] == action)
+                and (since is None or e[0] >= since)]
+
+    def first(self, device=None, action=None, since=None):
+        found = self.find(device, action, since)
+        return found[0] if found else None
+
+# ======== SIMULATED DEVICES ========
+class SimGPIO:
+    """The part of the RPi.GPIO module CarHW uses"""
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    HIGH = 1
+    LOW = 0
+
+    def __init__(self, trace, pwm_threads=True):
+        self.trace = trace
+        self.pwm_threads = pwm_threads
+        self.pins = {}
+        self.pwms = []
+
+    def setmode(self, mode):
+        pass
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, mode, initial=0):
+        self.pins[pin] = int(bool(initial)) if mode == self.OUT else 0
+        self.trace("gpio", "setup", (pin, self.pins[pin]))
+
+    def output(self, pin, value):
+        self.pins[pin] = int(bool(value))
+        self.trace("gpio", "output", (pin, self.pins[pin]))
+
+    def input(self, pin):
+        return self.pins.get(pin, 0)
+
+    def PWM(self, pin, frequency):
+        pwm = SimSoftPWM(self, pin, frequency)
+        self.pwms.append(pwm)
+        return pwm
+
+    def cleanup(self):
+        for pwm in self.pwms:
+            pwm.stop()
+        self.pwms.clear()
+        self.pins.clear()
+        self.trace("gpio", "cleanup")
+
+class SimSoftPWM:
+    """RPi.GPIO software PWM: a thread toggling the pin twice per period"""
+    def __init__(self, gpio, pin, frequency):
+        self.gpio = gpio
+        self.pin = pin
+        self.frequency = frequency
+        self.duty = 0.0
+        self.running = False
+        self.periods = collections.deque(maxlen=10000)   # measured period lengths (s)
+        self._stop = threading.Event()
+        self._t = None
+
+    def start(self, duty):
+        self.running = True
+        self.ChangeDutyCycle(duty)
+        if self.gpio.pwm_threads and self._t is None:
+            self._t = threading.Thread(target=self._loop, daemon=True)
+            self._t.start()
+
+    def _loop(self):
+        # Like soft_pwm.c: sleep through the high and the low part of every period, whatever the duty
+        last = None
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if last is not None:
+                self.periods.append(now - last)
+            last = now
+            period = 1.0 / self.frequency
+            on = period * self.duty / 100.0
+            if on > 0:
+                self.gpio.pins[self.pin] = 1
+                time.sleep(on)
+            if on < period:
+                self.gpio.pins[self.pin] = 0
+                time.sleep(period - on)
+
+    def ChangeDutyCycle(self, duty):
+        self.duty = float(duty)
+        self.gpio.trace("pwm", "duty", (self.pin, self.duty))
+
+    def ChangeFrequency(self, frequency):
+        self.frequency = frequency
+        self.gpio.trace("pwm", "frequency", (self.pin, frequency))
+
+    def stop(self):
+        self.running = False
+        self._stop.set()
+        self.gpio.trace("pwm", "stop", (self.pin,))
+
+class SimPigpio:
+    """The pigpio module: pi() connects to a simulated daemon"""
+    OUTPUT = 1
+    INPUT = 0
+    pulse = collections.namedtuple("pulse", "gpio_on gpio_off delay")
+
+    def __init__(self, trace, call_s=100e-6, realtime=True, clock=time.monotonic, sleep=time.sleep):
+        self.trace = trace
+        self._timer_args = (call_s, realtime, clock, sleep)
+
+    def pi(self, host="localhost", port=8888):
+        call_s, realtime, clock, sleep = self._timer_args
+        return SimPi(self.trace, BusTimer(1, 0, call_s, realtime, clock, sleep, None, "pigpio"))
+
+class SimPi:
+    """A pigpio.pi connection; every call costs one daemon round trip"""
+    def __init__(self, trace, timer):
+        self.trace = trace
+        self.timer = timer
+        self.connected = True
+        self.servo = {}      # gpio -> pulse width (us)
+        self.pwm = {}        # gpio -> (frequency, duty 0..1e6) from hardware_PWM
+        self.levels = {}
+        self.waves = {}      # wave id -> pulses
+        self.tx = None       # (start time, pulses sent once, pulses looped) of the wave chain on air
+        self._building = []
+        self._next_wave = 0
+
+    def _call(self, action, value):
+        self.timer.transfer(0, action)
+        self.trace("pigpio", action, value)
+
+    def set_mode(self, gpio, mode):
+        self._call("mode", (gpio, mode))
+
+    def write(self, gpio, level):
+        self.levels[gpio] = int(bool(level))
+        self._call("write", (gpio, self.levels[gpio]))
+
+    def read(self, gpio):
+        return self.levels.get(gpio, 0)
+
+    def set_servo_pulsewidth(self, gpio, pulsewidth):
+        self.servo[gpio] = int(pulsewidth)
+        self._call("servo", (gpio, int(pulsewidth)))
+
+    def get_servo_pulsewidth(self, gpio):
+        return self.servo.get(gpio, 0)
+
+    def hardware_PWM(self, gpio, frequency, dutycycle):
+        self.pwm[gpio] = (int(frequency), int(dutycycle))
+        self._call("hardware_pwm", (gpio, int(frequency), int(dutycycle)))
+
+    # Waveforms: DMA-timed pulse trains, played without the daemon's or Python's help
+    def wave_add_new(self):
+        self._building = []
+        self._call("wave_add_new", None)
+
+    def wave_add_generic(self, pulses):
+        self._building.extend(pulses)
+        self._call("wave_add_generic", len(pulses))
+        return len(self._building)
+
+    def wave_create(self):
+        wid = self._next_wave
+        self._next_wave += 1
+        self.waves[wid] = self._building
+        self._building = []
+        self._call("wave_create", wid)
+        return wid
+
+    def wave_delete(self, wid):
+        del self.waves[wid]
+        self._call("wave_delete", wid)
+
+    def wave_chain(self, data):
+        # Only what PigpioMotor sends: waves once, then "255 0 <waves> 255 3" looped forever
+        once, loop, target = [], [], None
+        i = 0
+        while i < len(data):
+            if data[i] == 255:
+                if data[i + 1] == 0:
+                    target = loop
+                elif data[i + 1] != 3:
+                    raise ValueError(f"Unsupported wave chain command: 255 {data[i + 1]}")
+                i += 2
+            else:
+                (once if target is None else target).extend(self.waves[data[i]])
+                i += 1
+        self.tx = (self.timer.clock(), once, loop)
+        self._call("wave_chain", (len(once), len(loop)))
+
+    def wave_tx_stop(self):
+        self.tx = None
+        self._call("wave_tx_stop", None)
+
+    def wave_tx_busy(self):
+        if self.tx is None:
+            return 0
+        start, once, loop = self.tx
+        return int(bool(loop) or self.timer.clock() < start + sum(p.delay for p in once) / 1e6)
+
+    def stop(self):
+        self.connected = False
+        self.trace("pigpio", "stop")
+
+def wave_duty(pulses, gpio, period_us):
+    """Duty cycle (0..100) of gpio in each period_us window of a pulse train"""
+    mask = 1 << gpio
+    level, t, high = 0, 0, [0.0]
+    for p in pulses:
+        if p.gpio_on & mask:
+            level = 1
+        if p.gpio_off & mask:
+            level = 0
+        remaining = p.delay
+        while remaining > 0:
+            room = period_us * len(high) - t
+            step = min(room, remaining)
+            high[-1] += step * level
+            t += step
+            remaining -= step
+            if t >= period_us * len(high):
+                high.append(0.0)
+    if t <= period_us * (len(high) - 1):
+        high.pop()
+    return [100.0 * h / period_us for h in high]
+
+class SimPin:
+    """gpiozero output device for the OLED's DC and RST lines"""
+    def __init__(self, name, trace):
+        self.name = name
+        self.trace = trace
+        self.value = 0
+
+    def on(self):
+        self.value = 1
+
+    def off(self):
+        self.value = 0
+
+class SimRaspberryPi(config.RaspberryPi):
+    """OLED bus wiring (config.RaspberryPi) on timed simulated buses"""
+    def __init__(self, trace, bus="spi", spi_hz=1000000, i2c_hz=400000,
+                 realtime=True, clock=time.monotonic, sleep=time.sleep):
+        self.trace = trace
+        spi = TimedSpiDev(realtime=realtime, clock=clock, sleep=sleep, trace=trace)
+        i2c = TimedI2CBus(i2c_hz, realtime=realtime, clock=clock, sleep=sleep, trace=trace)
+        device = config.Device_SPI if bus == "spi" else config.Device_I2C
+        super().__init__(spi=spi, spi_freq=spi_hz, i2c=i2c, device=device)
+
+    def gpio_mode(self, Pin, Mode):
+        return SimPin(Pin, self.trace)
+
+    def spi_writebyte(self, data):
+        self.spi.write([data[0]], "data" if self.GPIO_DC_PIN.value else "cmd")
+
+    def spi_writebytes(self, data):
+        self.spi.write(data, "data" if self.GPIO_DC_PIN.value else "cmd")
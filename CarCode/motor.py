@@ -0,0 +1,121 @@
+import time
+
+# ======== MOTOR DRIVERS ========
+# Speed control of the drive motor's PWM (enable) pin. CarHW sets the H-bridge
+# direction pins itself and hands the driver an unsigned duty cycle (0..100).
+#   "soft"    RPi.GPIO software PWM: a thread toggling the pin, immediate changes
+#   "pigpio"  pigpio DMA-timed waveforms: steady duty and acceleration ramps are
+#             played out by the DMA engine, so Python only starts them
+# hardware_PWM would need GPIO 12/13/18/19 (12 drives the servo), so the
+# pigpio driver builds its own PWM from waveforms on whichever pin it is given.
+
+class SoftPWMMotor:
+    ramps = False
+
+    def __init__(self, GPIO, pin, frequency):
+        self.pwm = GPIO.PWM(pin, frequency)
+        self.pwm.start(0)
+        self.duty = 0.0
+
+    def set(self, duty, ramp=True):
+        self.duty = max(0.0, min(100.0, float(duty)))
+        self.pwm.ChangeDutyCycle(self.duty)
+
+    def close(self):
+        self.pwm.stop()
+
+class PigpioMotor:
+    """PWM and duty-cycle ramps as pigpio waveforms.
+
+    A change of speed becomes one wave chain: a ramp of ramp_s seconds, one
+    PWM period per step from the current duty to the new one, then a single
+    period at the new duty looped until the next change. Going to 0 ends with
+    the pin low. Changing speed mid-ramp starts from the duty the old ramp had
+    reached.
+    """
+    ramps = True
+
+    def __init__(self, pi, pigpio, pin, frequency, ramp_s=0.04, clock=time.monotonic):
+        self.pigpio = pigpio     # the module (or hardware.SimPigpio), for pulse and OUTPUT
+        self.pi = pi
+        self.pin = pin
+        self.frequency = frequency
+        self.ramp_s = ramp_s
+        self.clock = clock
+        self.period_us = int(round(1e6 / frequency))
+        self.duty = 0.0
+        self._from = 0.0         # ramp currently playing: from duty, at time, over seconds
+        self._start = 0.0
+        self._ramp_len = 0.0
+        self._waves = []         # wave ids of the chain on air
+        pi.set_mode(pin, pigpio.OUTPUT)
+        pi.write(pin, 0)
+
+    def current(self):
+        # Duty the output has reached, allowing for a ramp still in progress
+        if self._ramp_len <= 0:
+            return self.duty
+        done = min(1.0, (self.clock() - self._start) / self._ramp_len)
+        return self._from + (self.duty - self._from) * done
+
+    def _period(self, duty):
+        on = int(round(self.period_us * duty / 100.0))
+        mask = 1 << self.pin
+        if on <= 0:
+            return [self.pigpio.pulse(0, mask, self.period_us)]
+        if on >= self.period_us:
+            return [self.pigpio.pulse(mask, 0, self.period_us)]
+        return [self.pigpio.pulse(mask, 0, on), self.pigpio.pulse(0, mask, self.period_us - on)]
+
+    def _wave(self, pulses):
+        self.pi.wave_add_new()
+        self.pi.wave_add_generic(pulses)
+        wid = self.pi.wave_create()
+        self._waves.append(wid)
+        return wid
+
+    def set(self, duty, ramp=True):
+        duty = max(0.0, min(100.0, float(duty)))
+        start = self.current()
+        if duty == start == self.duty and (self._waves or duty == 0):
+            return   # already there
+        steps = int(round(self.ramp_s * self.frequency)) if ramp and duty != start else 0
+
+        self._clear()
+        chain = []
+        if steps:
+            pulses = []
+            for i in range(1, steps + 1):
+                pulses += self._period(start + (duty - start) * i / steps)
+            chain.append(self._wave(pulses))
+        if duty > 0:
+            chain += [255, 0, self._wave(self._period(duty)), 255, 3]   # loop forever
+        if chain:
+            self.pi.wave_chain(chain)
+        else:
+            self.pi.write(self.pin, 0)
+
+        self._from, self._start = start, self.clock()
+        self._ramp_len = steps / float(self.frequency)
+        self.duty = duty
+
+    def _clear(self):
+        if self._waves:
+            self.pi.wave_tx_stop()
+            self.pi.write(self.pin, 0)   # tx_stop can leave the pin high mid-period
+            for wid in self._waves:
+                self.pi.wave_delete(wid)
+            self._waves = []
+
+    def close(self):
+        self._clear()
+        self.pi.write(self.pin, 0)
+
+MOTOR_DRIVERS = ("soft", "pigpio")
+
+def make_motor(name, backend, GPIO, pi, pin, frequency, ramp_s=0.04):
+    if name == "soft":
+        return SoftPWMMotor(GPIO, pin, frequency)
+    if name == "pigpio":
+        return PigpioMotor(pi, backend.pigpio_module, pin, frequency, ramp_s)
+    raise ValueError(f"Unknown motor driver: {name}")
@@ -0,0 +1,129 @@
+import time
+
+# ======== TIMELINE ========
+# A behavior is a list of timed keyframes across tracks, played by one
+# thread against one monotonic clock so the face, lights and motors can't
+# drift apart. Tracks and their values:
+#   "oled"  packed display buffer (see drive.framebuf)
+#   "led"   True / False
+#   "motor" signed duty cycle: >0 forward, <0 backward, 0 stop
+#   "servo" steering angle in degrees
+TRACKS = ("oled", "led", "motor", "servo")
+
+class Timeline:
+    def __init__(self, name, end=0.0):
+        self.name = name
+        self.end = end       # seconds; playback lasts at least this long
+        self._events = []    # [(t, seq, track, value), ...]
+
+    def at(self, t, track, value):
+        if track not in TRACKS:
+            raise ValueError(f"Unknown track: {track}")
+        self._events.append((float(t), len(self._events), track, value))
+        self.end = max(self.end, float(t))
+        return self
+
+    def keyframes(self, frames):
+        """Add (t, track, value) tuples"""
+        for t, track, value in frames:
+            self.at(t, track, value)
+        return self
+
+    def gif(self, frames, t=0.0):
+        """Add GIF frames [(buf, dt_sec), ...] back to back starting at t"""
+        for buf, dt in frames:
+            self.at(t, "oled", buf)
+            t += dt
+        self.end = max(self.end, t)
+        return self
+
+    def flash(self, times, on_s, off_s, t=0.0):
+        """LED on/off cycles, ending with the LED back on"""
+        for _ in range(max(1, int(times))):
+            self.at(t, "led", True)
+            self.at(t + on_s, "led", False)
+            t += on_s + off_s
+        self.at(t, "led", True)
+        return self
+
+    def events(self):
+        return [(t, track, value) for t, _, track, value in sorted(self._events, key=lambda e: e[:2])]
+
+def wait(seconds, sleep=None, cancel=None):
+    """Sleep with sleep() if given, else on the cancel event so it can cut the wait short"""
+    if sleep is not None:
+        sleep(seconds)
+    elif cancel is not None:
+        cancel.wait(seconds)
+    else:
+        time.sleep(seconds)
+
+def play(timeline, target, clock=time.monotonic, sleep=None, cancel=None):
+    """Apply every keyframe to target.apply(track, value) at start + t.
+
+    An OLED frame is skipped when the next OLED frame is already due, so a
+    slow display never holds up the other tracks. Returns timing stats,
+    including the mean, p95 and max lateness of the keyframes applied.
+    """
+    events = timeline.events()
+    next_oled = [None] * len(events)
+    upcoming = None
+    for i in range(len(events) - 1, -1, -1):
+        if events[i][1] == "oled":
+            next_oled[i] = upcoming
+            upcoming = events[i][0]
+
+    start = clock()
+    lateness = []
+    dropped = 0
+    cancelled = False
+    for i, (t, track, value) in enumerate(events):
+        remaining = start + t - clock()
+        if remaining > 0:
+            wait(remaining, sleep, cancel)
+        if cancel is not None and cancel.is_set():
+            cancelled = True
+            break
+        now = clock()
+        if track == "oled" and next_oled[i] is not None and now >= start + next_oled[i]:
+            dropped += 1
+            continue
+        lateness.append(now - start - t)
+        target.apply(track, value)
+    if not cancelled:
+        remaining = start + timeline.end - clock()
+        if remaining > 0:
+            wait(remaining, sleep, cancel)
+    return {
+        "name": timeline.name,
+        "events": len(events),
+        "applied": len(lateness),
+        "dropped": dropped,
+        "cancelled": cancelled,
+        "expected_s": timeline.end,
+        "elapsed_s": clock() - start,
+        "late_mean_ms": 1000.0 * sum(lateness) / len(lateness) if lateness else 0.0,
+        "late_p95_ms": 1000.0 * sorted(lateness)[int(0.95 * (len(lateness) - 1))] if lateness else 0.0,
+        "late_max_ms": 1000.0 * max(lateness) if lateness else 0.0,
+    }
+
+# ======== SIMULATION ========
+class ManualClock:
+    """Clock that only moves when slept on, for exact timestamps in tests"""
+    def __init__(self, t=0.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+    def sleep(self, seconds):
+        self.t += max(0.0, seconds)
+
+class RecordingTarget:
+    """Stands in for CarHW, recording (time, track, value) for every keyframe"""
+    def __init__(self, clock):
+        self.clock = clock
+        self.trace = []
+
+    def apply(self, track, value):
+        self.trace.append((self.clock(), track, value))
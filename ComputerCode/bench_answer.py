@@ -0,0 +1,34 @@
+# End-of-speech-to-verdict latency for a recorded answer.
+# Compares the old path (write recording.wav, let Whisper decode the file
+# with ffmpeg) with transcribing the captured samples straight from memory.
+# Usage:  python ComputerCode/bench_answer.py answer.wav five [runs]
+import sys
+import time
+import computer_agent as ca
+
+def via_disk(samples):
+    out_path = "recording/recording.wav"
+    ca.write_wav_int16(out_path, samples, ca.SAMPLE_RATE)
+    return ca.whisperModel.transcribe(out_path, fp16=False)["text"]
+
+def via_memory(samples):
+    return ca.transcribe_audio(samples)
+
+def main():
+    path, expected = sys.argv[1], sys.argv[2]
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    ca.load_models(["whisper"])
+    samples = ca.read_wav_int16(path)
+    expected = ca.normalize_answer(expected)
+    via_memory(samples)  # warm up
+    for label, fn in (("disk", via_disk), ("memory", via_memory)):
+        times = []
+        for _ in range(runs):
+            t = time.perf_counter()
+            verdict = ca.normalize_answer(fn(samples)) == expected
+            times.append((time.perf_counter() - t) * 1000)
+        times.sort()
+        print(f"{label:7s} median {times[len(times) // 2]:7.1f} ms  min {times[0]:7.1f} ms  correct={verdict}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Button press to question audio ready, with and without prefetching the next
+# question while the child answers. Runs headless: TTS is a fake that sleeps
+# like Silero would, the answer is a fake that takes as long as a child does,
+# and nothing is played or sent to the car. Halfway through, the speaker
+# setting changes so the prefetched question goes stale and is redone.
+# Usage:  python ComputerCode/bench_prefetch.py [rounds] [tts_ms] [answer_ms]
+import sys
+import time
+import numpy as np
+import computer_agent as ca
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    tts_s = (float(sys.argv[2]) if len(sys.argv) > 2 else 400) / 1000
+    answer_s = (float(sys.argv[3]) if len(sys.argv) > 3 else 1500) / 1000
+    settings = {"speaker": ca.TTS_SPEAKER}
+
+    def fake_render(text):
+        time.sleep(tts_s)
+        return np.zeros(int(ca.TTS_SAMPLE_RATE * 0.01 * len(text)), dtype=np.float32)
+
+    def fake_listen(incremental):
+        time.sleep(answer_s)
+        return np.zeros(ca.SAMPLE_RATE, dtype=np.int16), "five"
+
+    ca.ARCHIVE_RECORDINGS = False
+    for prefetch in (False, True):
+        settings["speaker"] = ca.TTS_SPEAKER
+        prefetcher = ca.QuestionPrefetcher(render=fake_render, settings=lambda: settings["speaker"]) if prefetch else None
+        pipeline = ca.QuestionRound(say=lambda text, wait, audio=None: None, listen=fake_listen,
+                                    react=lambda event, trace_id=None: "SKIPPED", prefetcher=prefetcher, render=fake_render)
+        if prefetcher is not None:
+            prefetcher.prefetch()   # as the GUI does once the models are in
+            time.sleep(tts_s)
+        prepare = []
+        for i in range(rounds):
+            if i == rounds // 2:
+                settings["speaker"] = "en_0"   # e.g. a different voice was picked
+            result = pipeline.run()
+            prepare.append(result["timings"]["prepare"] * 1000)
+            time.sleep(0.2)    # child looks at the car before pressing again
+        print(f"{'prefetch' if prefetch else 'no prefetch':11s} prepare ms: "
+              + " ".join(f"{ms:5.0f}" for ms in prepare)
+              + (f"   {prefetcher.stats}" if prefetcher else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Time from "say this" to audio ready, cold vs cached.
+# cold:   Silero apply_tts on every call (the old CarGUIApp.saySomething)
+# disk:   clip read from the phrase cache directory (first use after a warm-up)
+# memory: clip already in the in-memory LRU
+# stitch: uncached feedback sentences assembled from cached fragments (SegmentedSpeech)
+# Also times a process-pool warm-up of a sample of the app's phrases, and
+# checks that stitched audio has the length crossfade_concat promises.
+# Usage:  python ComputerCode/bench_tts.py [phrases] [workers]
+import random
+import shutil
+import sys
+import tempfile
+import time
+import computer_agent as ca
+import numpy as np
+import tts_cache
+
+def timed(fn, texts):
+    times = []
+    for text in texts:
+        t = time.perf_counter()
+        fn(text)
+        times.append((time.perf_counter() - t) * 1000)
+    times.sort()
+    return times
+
+def report(label, times):
+    print(f"{label:7s} median {times[len(times) // 2]:8.2f} ms  max {times[-1]:8.2f} ms")
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else ca.TTS_WORKERS
+    texts = random.Random(0).sample(ca.all_phrases(), n)
+    ca.load_models(["tts"])
+    cache_dir = tempfile.mkdtemp(prefix="tts_bench_")
+    try:
+        def cache():
+            return tts_cache.PhraseCache(ca.ttsmodel, ca.ttsmodel_id, ca.TTS_SPEAKER, ca.TTS_SAMPLE_RATE,
+                                         language=ca.language, cache_dir=cache_dir)
+
+        report("cold", timed(lambda text: tts_cache.synthesize(ca.ttsmodel, text, ca.TTS_SPEAKER,
+                                                               ca.TTS_SAMPLE_RATE), texts))
+
+        t = time.perf_counter()
+        written = cache().warm_up(texts, workers=workers, background=False)
+        print(f"warm-up {written} clips with {workers} workers in {time.perf_counter() - t:.2f} s")
+
+        warm = cache()
+        report("disk", timed(warm.get, texts))
+        report("memory", timed(warm.get, texts))
+        print("stats", warm.stats)
+
+        # Feedback for a misheard answer: never cached as a whole sentence
+        said = ["one", "seven", "nine", "a cat", "seven apples", "nine nine"]
+        free = [ca.incorrect_message(ca.number_to_words(i % 9 + 1), said[i % len(said)]) for i in range(n)]
+        speech = tts_cache.SegmentedSpeech(warm, ca.SPEECH_FRAGMENTS)
+        warm.warm_up(speech.fragment_texts(), workers=workers, background=False)
+        for text in free:
+            speech.stitch(text)    # first use pays for the one-off unknown words ("a cat")
+        report("stitch", timed(speech.stitch, free))
+        report("silero", timed(lambda text: tts_cache.synthesize(ca.ttsmodel, text, ca.TTS_SPEAKER,
+                                                                ca.TTS_SAMPLE_RATE), free[:3]))
+        check_stitch(speech, free)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+def check_stitch(speech, texts):
+    sr = speech.cache.sample_rate
+    for text in texts:
+        parts = []
+        for kind, value in speech.split(text):
+            if kind == "pause":
+                parts.append(np.zeros(int(sr * value / 1000), dtype=np.float32))
+            else:
+                parts.append(tts_cache.trim_silence(speech.cache.get(value), sr))
+        n = int(sr * speech.crossfade_ms / 1000)
+        expected = sum(len(p) for p in parts) - sum(min(n, len(a), len(b)) for a, b in zip(parts, parts[1:]))
+        audio = speech.stitch(text)
+        assert audio.dtype == np.float32 and len(audio) == expected, (text, len(audio), expected)
+    print(f"stitched length ok for {len(texts)} sentences at {sr} Hz")
+
+if __name__ == "__main__":
+    main()
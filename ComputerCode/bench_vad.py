@@ -0,0 +1,32 @@
+# VAD loop throughput: one chunk per wake-up vs. draining the queue.
+# A recording is replayed through audio_cb (as fast as possible, then at the
+# real audio rate) and listen_for_answer reports chunks/s and queue depth.
+# Usage:  python ComputerCode/bench_vad.py answer.wav
+import sys
+import time
+import computer_agent as ca
+
+def run(samples, batched, realtime):
+    while not ca.q.empty():
+        ca.q.get_nowait()
+    feeder = ca.replay_audio(samples, realtime=realtime)
+    if not realtime:
+        feeder.join()  # whole file queued up front, like a loop that fell far behind
+    t = time.perf_counter()
+    ca.listen_for_answer(open_stream=False, incremental=False, batched=batched)
+    wall = time.perf_counter() - t
+    feeder.join()
+    stats = ca.listen_stats
+    print(f"{'drained' if batched else 'per-chunk':9s} {'realtime' if realtime else 'backlog':8s} "
+          f"{stats['chunks']:5d} chunks  {stats['chunks'] / stats['vad_s']:8.0f} chunks/s in VAD  "
+          f"{stats['chunks'] / wall:8.0f} chunks/s overall  max queue depth {stats['max_queue_depth']}")
+
+def main():
+    ca.load_models(["vad"])
+    samples = ca.read_wav_int16(sys.argv[1])
+    for realtime in (False, True):
+        for batched in (False, True):
+            run(samples, batched, realtime)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+import socket
+import threading
+import time
+
+ADDRESS_TTL = 300.0   # s before the car's resolved address is looked up again
+PING_INTERVAL = 2.0   # s between background health checks
+
+def traced(event, trace_id, sent):
+    """
+    Adds a trace id and the send time (time.time()) to a command: "RIGHT |trace=1a2b3c4d t=1712.5".
+    The car strips everything after " |" before handling the command, and records its own
+    timestamps under the id for the TRACE command (see CarConnection.trace_marks).
+    """
+    return f"{event} |trace={trace_id} t={sent:.6f}"
+
+def resolve_host(host, port):
+    """Resolves host (e.g. "camrynpi.local" via mDNS) to an IPv4 address."""
+    return socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM)[0][4][0]
+
+class CarConnection:
+    """
+    Keep-alive command connection to the car agent.
+
+    The socket is opened on first use and reused for every command after that,
+    so the TCP handshake is paid once per session instead of once per
+    reaction. If the car drops the connection (restart, idle timeout, Wi-Fi
+    hiccup) the command is retried once on a fresh socket.
+
+    Commands never resolve the host: the address comes from refresh_address(),
+    which CarMonitor calls off the reaction path, and the last good one is kept
+    when a connect fails. After a failed connect, commands fail at once for
+    retry_after seconds instead of waiting out the timeout again; a PING that
+    gets through (see ping) reopens the connection before that.
+
+    Args:
+        host (str): Hostname or IP address of the car.
+        port (int): Port of the car agent.
+        token (str, optional): Shared token prepended as "token:COMMAND".
+        timeout (float, optional): Connect and reply timeout in seconds.
+        resolver (callable, optional): resolver(host, port) -> IP address. Defaults to resolve_host.
+        address_ttl (float, optional): Seconds a resolved address is considered fresh.
+        retry_after (float, optional): Seconds commands fail fast after a failed connect.
+    """
+    def __init__(self, host, port, token=None, timeout=0.5, resolver=None,
+                 address_ttl=ADDRESS_TTL, retry_after=PING_INTERVAL, clock=time.monotonic):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.timeout = timeout
+        self._resolver = resolver or resolve_host
+        self._address_ttl = address_ttl
+        self._retry_after = retry_after
+        self._clock = clock
+        self._addr = None       # cached IP of host
+        self._addr_time = 0.0
+        self._failed_at = None  # clock() of the last failed connect
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _line(self, event):
+        return f"{self.token}:{event}\n" if self.token else f"{event}\n"
+
+    @property
+    def address(self):
+        """The last resolved IP address, or None before the first resolution."""
+        return self._addr
+
+    def refresh_address(self, force=False):
+        """
+        Resolves the host again if the cached address is missing, older than the
+        TTL, or force is set. Meant to run off the reaction path (see CarMonitor);
+        if the address changed, the open connection is dropped.
+
+        Returns:
+            str: The current IP address.
+        """
+        if not force and self._addr is not None and self._clock() - self._addr_time < self._address_ttl:
+            return self._addr
+        addr = self._resolver(self.host, self.port)
+        with self._lock:
+            if addr != self._addr:
+                self._close()
+                self._failed_at = None
+            self._addr = addr
+            self._addr_time = self._clock()
+        return addr
+
+    def _open(self, addr):
+        sock = socket.create_connection((addr, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _connect(self):
+        # Never resolves here (see refresh_address) and doesn't retry a car that just refused
+        if self._addr is None:
+            raise ConnectionError("car address not resolved yet")
+        if self._failed_at is not None and self._clock() - self._failed_at < self._retry_after:
+            raise ConnectionError("car offline")
+        try:
+            self._sock = self._open(self._addr)
+        except OSError:
+            self._failed_at = self._clock()
+            raise
+        self._failed_at = None
+        self._reader = self._sock.makefile("rb")
+
+    def close(self):
+        """Closes the connection; the next command reconnects."""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def _exchange(self, events):
+        if self._sock is None:
+            self._connect()
+        self._sock.sendall("".join(self._line(e) for e in events).encode())
+        replies = []
+        for _ in events:
+            line = self._reader.readline()
+            if not line:
+                raise ConnectionResetError("car closed the connection")
+            replies.append(line.decode("utf-8", errors="ignore").strip())
+        return replies
+
+    def send_many(self, events):
+        """
+        Pipelines several commands: all lines are written at once, then the
+        replies are read back in the same order.
+
+        Returns:
+            list: One reply per event, or "ERR <ExceptionName>" for each event
+            if the exchange failed twice.
+        """
+        with self._lock:
+            for attempt in range(2):
+                fresh = self._sock is None
+                try:
+                    return self._exchange(events)
+                except Exception as e:
+                    self._close()
+                    # Only a dropped keep-alive socket is worth a second try
+                    if attempt == 1 or fresh or isinstance(e, socket.timeout):
+                        return [f"ERR {e.__class__.__name__}"] * len(events)
+
+    def send(self, event):
+        """
+        Sends one command and waits for its reply.
+
+        Returns:
+            str: The car's reply (e.g. "OK RIGHT", "PONG"), or "ERR <ExceptionName>".
+        """
+        return self.send_many([event])[0]
+
+    def ping(self):
+        """
+        Sends PING for a health check. Over the open connection when there is one; otherwise
+        on a socket of its own, outside the lock, so commands aren't held up while it connects.
+        If the car answers, that socket becomes the connection for the next commands.
+
+        Returns:
+            str: "PONG", or another reply / "ERR <ExceptionName>".
+        """
+        with self._lock:
+            connected = self._sock is not None
+        if connected:
+            return self.send("PING")
+        addr = self._addr
+        if addr is None:
+            return "ERR ConnectionError"
+        sock = reader = None
+        try:
+            sock = self._open(addr)
+            sock.sendall(self._line("PING").encode())
+            reader = sock.makefile("rb")
+            reply = reader.readline().decode("utf-8", errors="ignore").strip()
+        except OSError as e:
+            reply = f"ERR {e.__class__.__name__}"
+        if reply == "PONG":
+            with self._lock:
+                if self._sock is None and self._addr == addr:
+                    self._sock, self._reader, sock = sock, reader, None
+                    self._failed_at = None
+        if sock is not None:
+            try:
+                if reader is not None:
+                    reader.close()
+                sock.close()
+            except OSError:
+                pass
+        return reply or "ERR ConnectionResetError"
+
+    def trace_marks(self, trace_id, clock=time.time):
+        """
+        Asks the car for the timestamps it recorded for a traced command (recv, parsed, enqueue,
+        dequeue, first_frame, first_motor, ...) and moves them onto this machine's clock. The
+        offset between the clocks is estimated from the query itself: the car's "now" is taken
+        to be halfway through the round trip.
+
+        Returns:
+            dict: Mark name -> time in this machine's time.time(), or None if the car doesn't
+            know the id (or predates tracing).
+        """
+        t0 = clock()
+        reply = self.send(f"TRACE {trace_id}")
+        t1 = clock()
+        parts = reply.split()
+        if len(parts) < 3 or parts[0] != "TRACE" or parts[1] != trace_id:
+            return None
+        fields = {k: float(v) for k, v in (p.split("=", 1) for p in parts[2:] if "=" in p)}
+        offset = fields.pop("now") - (t0 + t1) / 2
+        return {name: t - offset for name, t in fields.items()}
+
+class CarMonitor:
+    """
+    Background health check of a CarConnection: keeps its address fresh and
+    sends PING every interval, recording whether the car answered and how
+    long the round trip took. This is the only place the host is resolved;
+    after a failed PING the next check resolves it again, since the car may
+    have come back under a new address.
+    """
+    def __init__(self, conn, interval=PING_INTERVAL):
+        self.conn = conn
+        self.interval = interval
+        self.online = None      # None until the first check completes
+        self.rtt_ms = None
+        self.last_error = None
+        self._stale = True      # resolve regardless of the TTL at the next check
+        self._stop = threading.Event()
+        self._t = threading.Thread(target=self._loop, daemon=True)
+
+    def start(self):
+        self._t.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self):
+        """Runs one health check and returns True if the car answered PONG."""
+        try:
+            self.conn.refresh_address(force=self._stale)
+            self._stale = False
+        except OSError as e:
+            if self.conn.address is None:
+                self.online, self.rtt_ms = False, None
+                self.last_error = f"ERR {e.__class__.__name__}"
+                return False
+            # keep pinging the last good address
+        t = time.perf_counter()
+        reply = self.conn.ping()
+        self.online = reply == "PONG"
+        self._stale = not self.online
+        self.rtt_ms = (time.perf_counter() - t) * 1000 if self.online else None
+        self.last_error = None if self.online else reply
+        return self.online
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(self.interval)
+
+    def status_text(self):
+        """Short description for the GUI status label."""
+        if self.online is None:
+            return "Car: connecting..."
+        if self.online:
+            return f"Car: online ({self.rtt_ms:.0f} ms)"
+        return "Car: offline"
+
+_pool = {}
+_pool_lock = threading.Lock()
+
+def get_connection(host, port, token=None, timeout=0.5):
+    """Returns the shared keep-alive connection for (host, port, token)."""
+    key = (host, port, token)
+    with _pool_lock:
+        conn = _pool.get(key)
+        if conn is None:
+            conn = _pool[key] = CarConnection(host, port, token=token, timeout=timeout)
+        return conn
+
+def send_once(event, host, port, token=None, timeout=0.5):
+    """
+    Legacy one-shot mode: new connection per event, no reply awaited.
+
+    Returns:
+        str: "SENT" if the message was sent successfully, or "ERR <ExceptionName>".
+    """
+    msg = f"{token}:{event}\n" if token else f"{event}\n"
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as s:
+            s.sendall(msg.encode())
+            # don't block waiting for reply
+            return "SENT"
+    except Exception as e:
+        return f"ERR {e.__class__.__name__}"
@@ -0,0 +1,122 @@
+# Checks of the capture ring buffer (AudioRing) fed through audio_cb with
+# synthetic blocks: every sample is a ramp of its stream position, so any
+# misplaced, stale or duplicated sample shows up. Covers writes across the
+# wrap point, zero-copy views, and listen_for_answer's pre-roll slicing and
+# MAX_UTTERANCE_S cut-off, with a fake VAD that calls loud chunks speech.
+# Usage:  python ComputerCode/check_audio_ring.py
+import sys
+import numpy as np
+import torch
+import computer_agent as ca
+
+failures = []
+
+def check(ok, what):
+    print(f"  {'ok  ' if ok else 'FAIL'}  {what}")
+    if not ok:
+        failures.append(what)
+
+def ramp(start, end, loud=False):
+    # Samples for stream positions start..end: quiet ramp in +-500, or loud in 5000..25000
+    pos = np.arange(start, end)
+    return ((pos * 7) % 20000 + 5000 if loud else pos % 1000 - 500).astype(np.int16)
+
+def feed(start, end, loud=False, block=ca.CHUNK_SAMPLES):
+    # Calls audio_cb as sounddevice would, with (frames, 1) int16 blocks
+    for s in range(start, end, block):
+        samples = ramp(s, min(s + block, end), loud)
+        ca.audio_cb(samples.reshape(-1, 1), len(samples), None, None)
+
+def drain():
+    out = []
+    while not ca.q.empty():
+        out.append(ca.q.get_nowait())
+    return out
+
+class FakeVAD:
+    """Speech probability 1 for loud chunks, 0 for quiet ones"""
+    def reset_states(self):
+        pass
+
+    def __call__(self, x, sample_rate):
+        return torch.tensor(1.0 if x.abs().mean().item() > 0.05 else 0.0)
+
+# ======== RING ========
+def check_ring():
+    print("AudioRing through audio_cb")
+    cap = 2048
+    ca.ring = ca.AudioRing(cap)
+    drain()
+    feed(0, 5 * cap + 300, block=500)   # 500 doesn't divide 2048, so blocks straddle the wrap
+    spans = drain()
+    check(spans == [(s, min(s + 500, 5 * cap + 300)) for s in range(0, 5 * cap + 300, 500)],
+          f"{len(spans)} blocks queued as consecutive (start, end) positions")
+    recent = [(s, e) for s, e in spans if s >= ca.ring.total - cap]
+    wrapped = [(s, e) for s, e in recent if s % cap > e % cap and e % cap]
+    check(all(np.array_equal(ca.ring.view(s, e), ramp(s, e)) for s, e in recent) and wrapped,
+          f"last {len(recent)} blocks read back exactly, {len(wrapped)} of them across the wrap")
+    end = ca.ring.total
+    view = ca.ring.view(end - cap, end)
+    check(np.array_equal(view, ramp(end - cap, end)) and np.shares_memory(view, ca.ring._buf),
+          f"full {cap}-sample span across the wrap is a view of the ring, not a copy")
+    try:
+        ca.ring.view(end - cap - 1, end)
+        evicted = False
+    except ValueError:
+        evicted = True
+    check(evicted, "a span older than the capacity raises ValueError")
+    start = ca.ring.total
+    feed(start, start + cap + 700, block=cap + 700)
+    drain()
+    check(np.array_equal(ca.ring.view(ca.ring.total - cap, ca.ring.total), ramp(start + 700, start + cap + 700)),
+          "a block longer than the ring keeps its newest samples")
+
+# ======== LISTEN ========
+def listen(quiet_s, speech_s, batched):
+    # Stream: quiet, speech, quiet; starts 3 s before a ring wrap so the answer crosses it.
+    # Returns (audio, expected) where expected follows listen_for_answer's endpointing.
+    sr, chunk = ca.SAMPLE_RATE, ca.CHUNK_SAMPLES
+    ca.ring = ca.AudioRing(int(ca.RING_SECONDS * sr))
+    ca.ring.write(ramp(0, 2 * ca.ring.capacity - 3 * sr))   # earlier audio nobody listened to
+    drain()
+    t0 = ca.ring.total
+    speech_start = t0 + int(quiet_s * sr) // chunk * chunk
+    speech_end = speech_start + int(speech_s * sr) // chunk * chunk
+    silence_end = speech_end + int(np.ceil(ca.SILENCE_MS / (1000 * chunk / sr))) * chunk
+    feed(t0, speech_start)
+    feed(speech_start, speech_end, loud=True)
+    feed(speech_end, silence_end + sr)
+    audio, _ = ca.listen_for_answer(open_stream=False, incremental=False, batched=batched)
+    drain()
+
+    utt_start = max(t0, speech_start - int(ca.PREROLL_MS * sr / 1000))
+    end = silence_end
+    cut = utt_start + int(ca.MAX_UTTERANCE_S * sr)
+    if cut < silence_end:
+        end = speech_start + -(-(cut - speech_start) // chunk) * chunk   # first chunk end past the limit
+    expected = np.concatenate([ramp(utt_start, speech_start), ramp(speech_start, min(end, speech_end), loud=True),
+                               ramp(min(end, speech_end), end)])
+    return audio, expected
+
+def check_listen():
+    ca.vadmodel = FakeVAD()
+    for batched in (True, False):
+        mode = "drained" if batched else "per-chunk"
+        print(f"listen_for_answer ({mode})")
+        audio, expected = listen(1.0, 2.0, batched)
+        check(np.array_equal(audio, expected) and not ca.listen_stats["truncated"],
+              f"2 s answer: {len(audio)} samples = {ca.PREROLL_MS} ms pre-roll + speech + {ca.SILENCE_MS} ms silence")
+        check(np.shares_memory(audio, ca.ring._buf), "answer is a view of the ring across the wrap")
+        audio, expected = listen(0.1, ca.MAX_UTTERANCE_S + 1.0, batched)
+        check(np.array_equal(audio, expected) and ca.listen_stats["truncated"],
+              f"endless answer cut at {len(audio) / ca.SAMPLE_RATE:.2f} s (MAX_UTTERANCE_S {ca.MAX_UTTERANCE_S:g}), "
+              f"pre-roll clipped to the 0.1 s heard")
+
+def main():
+    check_ring()
+    check_listen()
+    print(f"{len(failures)} failed" if failures else "all passed")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# Reaction delivery of car_link against a local stub car, with a fake
+# resolver that takes RESOLVE_DELAY_S like a slow mDNS lookup. Checks that
+# reactions stay under REACTION_BOUND_MS while the car is online, fail fast
+# once it is gone (also while CarMonitor is resolving), never call the
+# resolver themselves, and that the monitor brings the connection back.
+# Usage:  python ComputerCode/check_car_link.py
+import socket
+import sys
+import threading
+import time
+import car_link
+
+TOKEN = "monstercookiebrownie"
+RESOLVE_DELAY_S = 1.0
+REACTION_BOUND_MS = 50
+REACTIONS = 20
+
+failures = []
+
+def check(ok, what):
+    print(f"  {'ok  ' if ok else 'FAIL'}  {what}")
+    if not ok:
+        failures.append(what)
+
+class StubCar:
+    """Answers "token:RIGHT" with "OK RIGHT" and "token:PING" with "PONG", one thread per connection."""
+    def __init__(self, port=0):
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(("127.0.0.1", port))
+        self._server.listen(16)
+        self.port = self._server.getsockname()[1]
+        self._conns = []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            self._conns.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        replies = {"RIGHT": b"OK RIGHT\n", "WRONG": b"OK SAD\n", "PING": b"PONG\n"}
+        try:
+            for line in conn.makefile("rb"):
+                cmd = line.decode().strip().split(":", 1)[-1]
+                conn.sendall(replies.get(cmd, b"ERR UNKNOWN\n"))
+        except OSError:
+            pass
+
+    def stop(self):
+        # Like the car rebooting: the port refuses and open connections drop
+        try:
+            self._server.shutdown(socket.SHUT_RDWR)   # wakes the blocked accept()
+        except OSError:
+            pass
+        self._server.close()
+        for conn in self._conns:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+                conn.close()
+            except OSError:
+                pass
+
+class SlowResolver:
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, host, port):
+        self.calls += 1
+        time.sleep(self.delay)
+        return "127.0.0.1"
+
+def react(conn, n=1):
+    # (replies, slowest ms) of n RIGHT reactions
+    replies, worst = [], 0.0
+    for _ in range(n):
+        t = time.perf_counter()
+        replies.append(conn.send("RIGHT"))
+        worst = max(worst, (time.perf_counter() - t) * 1000)
+    return replies, worst
+
+def main():
+    car = StubCar()
+    resolver = SlowResolver(RESOLVE_DELAY_S)
+    conn = car_link.CarConnection("car.local", car.port, token=TOKEN, resolver=resolver)
+    monitor = car_link.CarMonitor(conn)
+
+    print("Online")
+    replies, worst = react(conn)
+    check(replies == ["ERR ConnectionError"] and worst < REACTION_BOUND_MS and resolver.calls == 0,
+          f"before the first resolution: {replies[0]} after {worst:.1f} ms, resolver not called")
+    check(monitor.check() and resolver.calls == 1, f"monitor resolved the car and got PONG ({monitor.rtt_ms:.1f} ms)")
+    replies, worst = react(conn, REACTIONS)
+    check(set(replies) == {"OK RIGHT"} and worst < REACTION_BOUND_MS,
+          f"{REACTIONS} reactions, slowest {worst:.1f} ms (bound {REACTION_BOUND_MS} ms)")
+
+    print("After a disconnect")
+    car.stop()
+    replies, worst = react(conn, REACTIONS)
+    check(all(r.startswith("ERR") for r in replies) and worst < REACTION_BOUND_MS,
+          f"{REACTIONS} reactions to a gone car: {replies[0]}, slowest {worst:.1f} ms")
+    check(set(replies[1:]) == {"ERR ConnectionError"},
+          "after one failed connect the rest fail without connecting again")
+    check(not monitor.check() and conn.address == "127.0.0.1",
+          f"monitor sees the car offline ({monitor.last_error}), last address kept")
+    checking = threading.Thread(target=monitor.check)
+    checking.start()    # resolves again, taking RESOLVE_DELAY_S
+    time.sleep(0.1)
+    replies, worst = react(conn, REACTIONS)
+    checking.join()
+    check(worst < REACTION_BOUND_MS,
+          f"reactions while the monitor resolves: slowest {worst:.1f} ms")
+    check(resolver.calls == 2, f"resolver called {resolver.calls} times, only by the monitor")
+
+    print("Back online")
+    car = StubCar(car.port)
+    check(monitor.check(), "monitor reconnects once the car answers again")
+    replies, worst = react(conn, REACTIONS)
+    check(set(replies) == {"OK RIGHT"} and worst < REACTION_BOUND_MS,
+          f"{REACTIONS} reactions, slowest {worst:.1f} ms (bound {REACTION_BOUND_MS} ms)")
+    car.stop()
+    conn.close()
+
+    print(f"{len(failures)} failed" if failures else "all passed")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
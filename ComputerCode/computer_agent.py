@@ -1,38 +1,94 @@
-import random, torch, whisper, re, string, threading, socket
+import time
+_T_START = time.perf_counter()   # startup timings are measured from here (see STARTUP_TIMING)
+import random, torch, whisper, re, string, threading
 import tkinter as tk 
 import sounddevice as sd
 from scipy.io.wavfile import write
 from enum import Enum
-import queue, time, wave, os
+import queue, wave, os
 from datetime import datetime
 import numpy as np
 from word2number import w2n
 from PIL import Image, ImageTk
+import car_link
+import model_loader
+import tts_cache
+import tracing
+
+# Models are loaded in the background by load_models() / model_loader.ModelLoader
+# so the window can come up first; these stay None until then.
+whisperModel = None
+whisper_lock = threading.Lock()   # one decode at a time: the partial-answer worker and the final pass share the model
+ttsmodel = None
+tts = None          # tts_cache.PhraseCache
+speech = None       # tts_cache.SegmentedSpeech
+vadmodel = None
+STARTUP_TIMING = False      # print per-phase startup timings (also: --startup-timing)
 
 #Setup whisper
-whisperModel = whisper.load_model("tiny")
+WHISPER_MODEL = "tiny"
+WHISPER_DIR = None          # download_root for Whisper checkpoints; None = ~/.cache/whisper
 
 #Setup TTS
 language = 'en'
 ttsmodel_id = 'v3_en'
 device = torch.device('cpu')
-ttsmodel, example_text = torch.hub.load(repo_or_dir='snakers4/silero-models',
-                                    model='silero_tts',
-                                    language=language,
-                                    speaker=ttsmodel_id)
-ttsmodel.to(device)
+TTS_SPEAKER = 'en_11'
+TTS_SAMPLE_RATE = 48000
+TTS_WARMUP = True           # pre-synthesize every question and feedback line at startup
+TTS_WORKERS = 2             # warm-up processes, each with its own copy of the model
+TTS_SEGMENTS = True         # stitch sentences that aren't cached from cached fragments (see SegmentedSpeech)
 
 #Setup VAD
+VAD_ONNX = False    # use Silero's ONNX export (onnxruntime) instead of the TorchScript model
 torch.set_num_threads(1)
-vadmodel, utils = torch.hub.load('snakers4/silero-vad', 'silero_vad', trust_repo=True)
-vadmodel = vadmodel.to(device).eval()
 
 SAMPLE_RATE = 16000
 OUT_DIR = "recording"
+ARCHIVE_RECORDINGS = True   # also save each answer to OUT_DIR/recording.wav, off the critical path
+
+# VAD settings
+CHANNELS = 1
+DTYPE = "int16"
+CHUNK_SAMPLES = 512                 # 32 ms @ 16 kHz (required by Silero)
+THRESH_START = 0.6
+THRESH_STOP  = 0.5
+SILENCE_MS   = 800
+VAD_BATCHED = True                  # drain every queued chunk per wake-up instead of one at a time
+VAD_MAX_BATCH = 64                  # chunks converted in one go (~2 s of audio)
+
+# Capture buffer
+MAX_UTTERANCE_S = 10.0              # an answer is cut off after this long
+PREROLL_MS = 300                    # audio kept from before the VAD detected speech
+RING_SECONDS = MAX_UTTERANCE_S + 5.0
+
+# Incremental transcription: decode while the child is still talking
+INCREMENTAL_ASR = True
+PARTIAL_EVERY_MS = 320              # re-decode after this much new speech
+PARTIAL_WINDOW_S = 4.0              # sliding window handed to Whisper
+EARLY_SILENCE_MS = 256              # silence that ends the answer once a confident digit is heard
+MIN_AVG_LOGPROB = -0.6              # Whisper segment confidence needed for an early exit
+MAX_NO_SPEECH_PROB = 0.5
+PARTIAL_WAIT_S = 10.0               # longest wait for an in-flight decode before decoding again
+DIGIT_WORDS = ("one", "two", "three", "four", "five", "six", "seven", "eight", "nine")
+
+# Answer recognizer: "whisper" (open transcription) or "digits" (score only the nine digit words)
+RECOGNIZER = "whisper"
+CAR_HOST = "camrynpi.local"
+CAR_PORT = 5005
+CAR_TOKEN = "monstercookiebrownie"
+CAR_STATUS_POLL_MS = 500
+MODEL_POLL_MS = 100
+PIPELINE_POLL_MS = 50
+PREFETCH_NEXT = True        # prepare the next question (text + speech) while the child answers
+PREFETCH_WAIT_S = 5.0       # longest wait for a prefetch still in flight before preparing afresh
+TRACE_FILE = None           # Chrome trace JSON of every round, computer and car side (also: --trace FILE)
+TRACE_FETCH_DELAY_S = 0.5   # wait before asking the car for its timestamps of a traced reaction
+TRACE_FETCH_TRIES = 5       # asks until the car's first frame is in (the reaction may be queued)
 os.makedirs(OUT_DIR, exist_ok=True)
 q = queue.Queue()
 
-def send_reaction(event: str, host="camrynpi.local", port=5005, token=None, timeout=0.5):
+def send_reaction(event: str, host=CAR_HOST, port=CAR_PORT, token=None, timeout=0.5, persistent=True, trace_id=None):
     # Sends a reaction event to a remote host over a socket connection.
 
     """
@@ -44,27 +100,109 @@ def send_reaction(event: str, host="camrynpi.local", port=5005, token=None, time
         port (int, optional): The port number to connect to. Defaults to 5005.
         token (str, optional): An optional authentication token to prepend to the event. Defaults to None.
         timeout (float, optional): The timeout for the socket connection in seconds. Defaults to 0.5.
+        persistent (bool, optional): If True, reuses a pooled keep-alive connection to the car and
+            waits for its reply. If False, opens a one-shot connection per event. Defaults to True.
+        trace_id (str, optional): Sends the trace id and send time along (see car_link.traced).
 
     Returns:
-        str: "SENT" if the message was sent successfully, or an error string in the format "ERR <ExceptionName>" if an exception occurred.
+        str: The car's reply (persistent) or "SENT" (one-shot) if the message was sent successfully,
+        or an error string in the format "ERR <ExceptionName>" if an exception occurred.
     """
-    msg = f"{token}:{event}\n" if token else f"{event}\n"
-    try:
-        with socket.create_connection((host, port), timeout=timeout) as s:
-            s.sendall(msg.encode())
-            # don't block waiting for reply
-            return "SENT"
-    except Exception as e:
-        return f"ERR {e.__class__.__name__}"
+    if trace_id is not None:
+        sent = tracing.tracer.clock()
+        tracing.tracer.mark(trace_id, "sent", sent)
+        event = car_link.traced(event, trace_id, sent)
+    if persistent:
+        return car_link.get_connection(host, port, token=token, timeout=timeout).send(event)
+    return car_link.send_once(event, host, port, token=token, timeout=timeout)
+
+def _load_whisper():
+    global whisperModel
+    whisperModel = whisper.load_model(WHISPER_MODEL, download_root=WHISPER_DIR)
+
+def _load_tts():
+    global ttsmodel, tts, speech
+    model = tts_cache.load_model(language, ttsmodel_id)
+    tts = tts_cache.PhraseCache(model, ttsmodel_id, TTS_SPEAKER, TTS_SAMPLE_RATE, language=language)
+    speech = tts_cache.SegmentedSpeech(tts, SPEECH_FRAGMENTS)
+    ttsmodel = model
+
+def _load_vad():
+    global vadmodel
+    model, _ = model_loader.hub_load('snakers4/silero-vad', 'silero_vad',
+                                     local_dir=model_loader.SILERO_VAD_DIR, onnx=VAD_ONNX)
+    vadmodel = model if VAD_ONNX else model.to(device).eval()
+
+models = model_loader.ModelLoader({"whisper": _load_whisper, "tts": _load_tts, "vad": _load_vad})
+startup_marks = []  # [(phase, seconds since _T_START)]
+
+def load_models(names=None):
+    """Loads the named models (default: all) concurrently and waits for them."""
+    models.start(names).wait(names)
+
+def mark_startup(phase):
+    startup_marks.append((phase, time.perf_counter() - _T_START))
+
+def print_startup_timings():
+    """Prints when each startup phase ended and how long each model took to load."""
+    print("Startup timings (s since process start):")
+    for phase, t in startup_marks:
+        print(f"  {phase:24s} {t:7.2f}")
+    base = dict(startup_marks).get("models started", 0.0)
+    for name, (start, end) in sorted(models.timings.items(), key=lambda kv: kv[1][1]):
+        print(f"  load {name:19s} {base + end:7.2f}  ({end - start:.2f} s)")
+
+class AudioRing:
+    """
+    Fixed-capacity int16 ring buffer that the microphone callback writes straight into.
+
+    Positions are absolute sample counts since the ring was created. Every sample is stored twice,
+    capacity apart, so any span of up to capacity samples is a single contiguous slice and view()
+    never has to copy. A view stays valid until capacity more samples have been written.
+
+    Args:
+        capacity (int): Number of samples kept.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._buf = np.zeros(2 * capacity, dtype=np.int16)
+        self.total = 0
+
+    def write(self, samples):
+        """Appends samples and returns the new end position."""
+        cap = self.capacity
+        if len(samples) > cap:
+            self.total += len(samples) - cap
+            samples = samples[-cap:]
+        n = len(samples)
+        pos = self.total % cap
+        first = min(n, cap - pos)
+        self._buf[pos:pos + first] = samples[:first]
+        self._buf[cap + pos:cap + pos + first] = samples[:first]
+        if first < n:
+            self._buf[:n - first] = samples[first:]
+            self._buf[cap:cap + n - first] = samples[first:]
+        self.total += n
+        return self.total
+
+    def view(self, start, end):
+        """Returns the samples between absolute positions start and end as a view."""
+        if end > self.total or self.total - start > self.capacity or start > end:
+            raise ValueError(f"samples {start}-{end} are not in the ring (at {self.total})")
+        s = start % self.capacity
+        return self._buf[s:s + end - start]
+
+ring = AudioRing(int(RING_SECONDS * SAMPLE_RATE))
 
 def audio_cb(indata, frames, time_info, status):
     """
     Callback function for sounddevice.InputStream.
-    Receives audio input chunks and puts them into a queue for processing.
+    Writes each audio block into the ring buffer and queues its (start, end) position for the VAD loop.
     """
     if status: print("sd status:", status)
     # indata: int16, shape (frames, channels)
-    q.put(indata.copy())
+    end = ring.write(indata[:, 0] if indata.ndim == 2 else indata)
+    q.put((end - frames, end))
 
 def write_wav_int16(path, samples_int16, sr=SAMPLE_RATE):
     """
@@ -76,6 +214,411 @@ def write_wav_int16(path, samples_int16, sr=SAMPLE_RATE):
         wf.setframerate(sr)
         wf.writeframes(samples_int16.tobytes())
 
+def read_wav_int16(path):
+    """Reads a mono 16-bit WAV recorded at SAMPLE_RATE."""
+    with wave.open(path, "rb") as wf:
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != SAMPLE_RATE:
+            raise ValueError(f"{path}: expected mono 16-bit {SAMPLE_RATE} Hz")
+        return np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+def archive_recording(samples_int16, path=None):
+    """
+    Saves a recording to disk on a background thread so that file I/O never delays the verdict.
+
+    Args:
+        samples_int16 (np.ndarray): Mono int16 samples at SAMPLE_RATE.
+        path (str, optional): Destination WAV file. Defaults to OUT_DIR/recording.wav.
+
+    Returns:
+        threading.Thread: The writer thread (already started).
+    """
+    path = path or os.path.join(OUT_DIR, "recording.wav")
+    t = threading.Thread(target=write_wav_int16, args=(path, samples_int16, SAMPLE_RATE), daemon=True)
+    t.start()
+    return t
+
+def transcribe_audio(samples_int16):
+    """
+    Transcribes a mono 16 kHz int16 recording with Whisper, straight from memory.
+
+    Whisper takes a float32 array in [-1, 1) at 16 kHz directly, so no WAV file
+    and no ffmpeg decode is involved.
+
+    Args:
+        samples_int16 (np.ndarray): Mono int16 samples at SAMPLE_RATE.
+
+    Returns:
+        str: The transcribed text.
+    """
+    audio = samples_int16.astype(np.float32) / 32768.0
+    with whisper_lock:
+        return whisperModel.transcribe(audio, fp16=False)["text"]
+
+_digit_candidates = None
+
+def _digit_token_batch():
+    # Token sequences "<|startoftranscript|><|en|><|transcribe|><|notimestamps|> five" etc.,
+    # with a few spellings per digit; built once and reused for every answer
+    global _digit_candidates
+    if _digit_candidates is None:
+        tokenizer = whisper.tokenizer.get_tokenizer(whisperModel.is_multilingual, language="en", task="transcribe")
+        prompt = list(tokenizer.sot_sequence_including_notimestamps)
+        seqs, owners = [], []
+        for d, word in enumerate(DIGIT_WORDS):
+            for variant in (f" {word}", f" {word.capitalize()}", f" {d + 1}"):
+                seqs.append(tokenizer.encode(variant))
+                owners.append(d)
+        width = max(len(seq) for seq in seqs)
+        tokens = torch.tensor([prompt + seq + [tokenizer.eot] * (width - len(seq)) for seq in seqs])
+        _digit_candidates = (len(prompt), seqs, torch.tensor(owners), tokens)
+    return _digit_candidates
+
+def recognize_digit(samples_int16):
+    """
+    Constrained recognition: scores only the nine digit words with Whisper instead of decoding freely.
+
+    The audio is encoded once, then every candidate spelling ("five", "Five", "5", ...) is scored in a
+    single batched decoder pass as the sum of its token log-probabilities after the transcription prompt.
+    Spellings of the same digit are combined and a softmax over the nine digits gives the confidence.
+
+    Args:
+        samples_int16 (np.ndarray): Mono int16 samples at SAMPLE_RATE.
+
+    Returns:
+        tuple: (word, confidence), e.g. ("five", 0.93).
+    """
+    prompt_len, seqs, owners, tokens = _digit_token_batch()
+    audio = whisper.pad_or_trim(samples_int16.astype(np.float32) / 32768.0)
+    mel = whisper.log_mel_spectrogram(audio).to(whisperModel.device)
+    with whisper_lock, torch.no_grad():
+        features = whisperModel.embed_audio(mel.unsqueeze(0))
+        batch = tokens.to(whisperModel.device)
+        logprobs = torch.log_softmax(whisperModel.logits(batch, features.expand(len(seqs), -1, -1)).float(), dim=-1)
+        scores = torch.empty(len(seqs))
+        for i, seq in enumerate(seqs):
+            # token k of the candidate is predicted at position prompt_len - 1 + k
+            positions = torch.arange(prompt_len - 1, prompt_len - 1 + len(seq))
+            scores[i] = logprobs[i, positions, torch.tensor(seq)].sum()
+        per_digit = torch.stack([torch.logsumexp(scores[owners == d], dim=0) for d in range(len(DIGIT_WORDS))])
+        probs = torch.softmax(per_digit, dim=0)
+    best = int(probs.argmax())
+    return DIGIT_WORDS[best], float(probs[best])
+
+def normalize_answer(text):
+    """
+    Normalizes an answer for comparison: digits 1–9 become words, punctuation and spaces are removed,
+    and everything is lowercased.
+
+    Args:
+        text (str): Transcribed or expected answer.
+
+    Returns:
+        str: The normalized answer, e.g. "Five." -> "five", "5" -> "five".
+    """
+    # Normalize to words 1–9, lowercase, no spaces
+    def num_to_word(match):
+        n = int(match.group())
+        return number_to_words(n)
+
+    text = text.translate(str.maketrans('', '', string.punctuation)).lower()
+    return re.sub(r'\b\d+\b', num_to_word, text).replace(" ", "")
+
+def replay_audio(samples_int16, realtime=True, tail_ms=SILENCE_MS + 200):
+    """
+    Feeds a recording through audio_cb in CHUNK_SAMPLES blocks, as the microphone stream would,
+    so listen_for_answer can be driven offline from a WAV fixture.
+
+    Args:
+        samples_int16 (np.ndarray): Mono int16 samples at SAMPLE_RATE.
+        realtime (bool, optional): If True, paces the blocks at the real audio rate. Defaults to True.
+        tail_ms (int, optional): Silence appended so the VAD can detect the end. Defaults to SILENCE_MS + 200.
+
+    Returns:
+        threading.Thread: The feeder thread (already started).
+    """
+    tail = np.zeros(int(SAMPLE_RATE * tail_ms / 1000), dtype=np.int16)
+    audio = np.concatenate([samples_int16.astype(np.int16), tail])
+    audio = np.pad(audio, (0, -len(audio) % CHUNK_SAMPLES))
+
+    def feed():
+        start = time.monotonic()
+        for i in range(0, len(audio), CHUNK_SAMPLES):
+            if realtime:
+                delay = start + i / SAMPLE_RATE - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            audio_cb(audio[i:i + CHUNK_SAMPLES].reshape(-1, 1), CHUNK_SAMPLES, None, None)
+
+    t = threading.Thread(target=feed, daemon=True)
+    t.start()
+    return t
+
+class IncrementalTranscriber:
+    """
+    Decodes partial answers on a worker thread while recording continues.
+
+    submit() hands over the audio captured so far; the worker always decodes the newest
+    snapshot (older pending ones are skipped) over a sliding window of PARTIAL_WINDOW_S.
+    A hypothesis is "confident" when it is a single digit word and Whisper's segment
+    scores clear MIN_AVG_LOGPROB / MAX_NO_SPEECH_PROB.
+    """
+    def __init__(self):
+        self._cv = threading.Condition()
+        self._pending = None     # (n_samples, audio) waiting to be decoded
+        self._latest = None      # (n_samples, text, confident) of the newest decode
+        self._stop = False
+        self._failed = False
+        self._t = threading.Thread(target=self._loop, daemon=True)
+        self._t.start()
+
+    def submit(self, audio_int16, end=None):
+        # end: position the audio reaches (defaults to its length), compared in result_for/wait_for
+        with self._cv:
+            self._pending = (len(audio_int16) if end is None else end, audio_int16)
+            self._cv.notify()
+
+    def close(self):
+        with self._cv:
+            self._stop = True
+            self._cv.notify()
+
+    def result_for(self, n_samples):
+        """Returns (text, confident) if the newest decode covers the first n_samples, else None."""
+        with self._cv:
+            if self._latest is not None and self._latest[0] >= n_samples:
+                return self._latest[1], self._latest[2]
+            return None
+
+    def wait_for(self, n_samples, timeout):
+        """Like result_for, but waits up to timeout seconds for a decode covering n_samples."""
+        deadline = time.monotonic() + timeout
+        with self._cv:
+            while self._latest is None or self._latest[0] < n_samples:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop or self._failed:
+                    return None
+                self._cv.wait(remaining)
+            return self._latest[1], self._latest[2]
+
+    def _loop(self):
+        while True:
+            with self._cv:
+                while self._pending is None and not self._stop:
+                    self._cv.wait()
+                if self._stop:
+                    return
+                n, audio = self._pending
+                self._pending = None
+            window = audio[-int(PARTIAL_WINDOW_S * SAMPLE_RATE):]
+            try:
+                with whisper_lock:
+                    result = whisperModel.transcribe(window.astype(np.float32) / 32768.0, fp16=False)
+            except Exception as e:
+                print("Partial transcription failed:", e)
+                with self._cv:
+                    self._failed = True
+                    self._cv.notify_all()
+                return
+            text = result["text"]
+            segments = result.get("segments") or []
+            confident = (normalize_answer(text) in DIGIT_WORDS and bool(segments)
+                         and min(seg["avg_logprob"] for seg in segments) >= MIN_AVG_LOGPROB
+                         and max(seg["no_speech_prob"] for seg in segments) <= MAX_NO_SPEECH_PROB)
+            with self._cv:
+                self._latest = (n, text, confident)
+                self._cv.notify_all()
+
+listen_stats = {}   # chunks, max_queue_depth, vad_s, truncated and speech_end_t of the last listen_for_answer
+
+def listen_for_answer(open_stream=True, incremental=INCREMENTAL_ASR, batched=VAD_BATCHED):
+    """
+    Captures one spoken answer from the audio queue, using Silero VAD to find where it starts and ends.
+
+    Audio lives in the ring buffer: only PREROLL_MS before the detected speech is kept, and an answer
+    longer than MAX_UTTERANCE_S is cut off there. With incremental decoding, the speech heard so far is transcribed in the background every
+    PARTIAL_EVERY_MS, and the answer ends after only EARLY_SILENCE_MS of silence once the
+    latest hypothesis is a confident digit covering all the speech.
+
+    Args:
+        open_stream (bool, optional): If True, records from the default input device. If False, the
+            caller feeds the queue (e.g. with replay_audio). Defaults to True.
+        incremental (bool, optional): Enables incremental decoding. Defaults to INCREMENTAL_ASR.
+        batched (bool, optional): Drains all queued chunks per wake-up and converts them to float32 in one
+            vectorized step into a preallocated buffer, instead of handling one chunk per wake-up.
+            The Silero model is stateful, so it still steps through the chunks in order. Defaults to VAD_BATCHED.
+
+    Returns:
+        tuple: (samples_int16, transcript) where samples_int16 is a zero-copy view into the ring and
+        transcript is the text already decoded for the whole answer, or None if it still has to be
+        transcribed.
+    """
+    chunk_ms = 1000 * CHUNK_SAMPLES / SAMPLE_RATE
+    silence_chunks_needed = int(np.ceil(SILENCE_MS / chunk_ms))
+    early_chunks_needed = int(np.ceil(EARLY_SILENCE_MS / chunk_ms))
+    partial_every = max(1, int(PARTIAL_EVERY_MS / chunk_ms))
+    preroll = int(PREROLL_MS * SAMPLE_RATE / 1000)
+    max_samples = int(MAX_UTTERANCE_S * SAMPLE_RATE)
+
+    stream = None
+    if open_stream:
+        # Use current default input if possible
+        INPUT_DEVICE = sd.default.device[0] if isinstance(sd.default.device, (list, tuple)) else None
+        stream = sd.InputStream(
+            samplerate=SAMPLE_RATE,
+            channels=CHANNELS,
+            dtype=DTYPE,
+            blocksize=CHUNK_SAMPLES,
+            device=INPUT_DEVICE,
+            callback=audio_cb,
+        )
+
+    transcriber = IncrementalTranscriber() if incremental else None
+    vadmodel.reset_states()
+    started = False
+    silence_run = 0
+    since_partial = 0
+    # Ring positions
+    listen_start = None     # first sample seen
+    utt_start = 0           # first sample of the answer (speech start minus pre-roll)
+    speech_start = 0        # start of the chunk where speech was first detected
+    speech_end = 0          # end of the last chunk that was speech
+    speech_end_t = None     # tracing clock when that chunk was processed
+    n_samples = 0           # end of the last chunk processed
+    chunks = 0
+    truncated = False
+    max_depth = 0
+    vad_time = 0.0
+
+    # Reused float32 buffer; the torch tensor shares its memory
+    vad_buf = np.empty(VAD_MAX_BATCH * CHUNK_SAMPLES, dtype=np.float32)
+    vad_tensor = torch.from_numpy(vad_buf)
+
+    if stream is not None:
+        # Drop blocks left over from a previous answer
+        while not q.empty():
+            q.get_nowait()
+        stream.start()
+    try:
+        done = False
+        while not done:
+            blocks = [q.get()]
+            if batched:
+                while len(blocks) < VAD_MAX_BATCH:
+                    try:
+                        blocks.append(q.get_nowait())
+                    except queue.Empty:
+                        break
+            max_depth = max(max_depth, len(blocks) + q.qsize())
+            if listen_start is None:
+                listen_start = blocks[0][0]
+            ends = [end for _, end in blocks]
+            blocks = [ring.view(start, end) for start, end in blocks]
+
+            t = time.perf_counter()
+            n = sum(len(b) for b in blocks)
+            np.concatenate(blocks, out=vad_buf[:n], casting="safe")
+            vad_buf[:n] *= 1.0 / 32768.0
+            with torch.no_grad():
+                probs = []
+                offset = 0
+                for chunk in blocks:
+                    x = vad_tensor[offset:offset + len(chunk)].unsqueeze(0)
+                    probs.append(vadmodel(x, SAMPLE_RATE).item())
+                    offset += len(chunk)
+            vad_time += time.perf_counter() - t
+
+            for chunk, end, prob in zip(blocks, ends, probs):
+                n_samples = end
+                chunks += 1
+
+                if not started and prob >= THRESH_START:
+                    started = True
+                    silence_run = 0
+                    speech_start = n_samples - len(chunk)
+                    utt_start = max(listen_start, speech_start - preroll)
+
+                if started:
+                    if prob < THRESH_STOP:
+                        silence_run += 1
+                    else:
+                        silence_run = 0
+                        speech_end = n_samples
+                        speech_end_t = tracing.tracer.clock()
+
+                    if transcriber is not None:
+                        since_partial += 1
+                        # Decode regularly during speech, and right away once it pauses
+                        if silence_run == 1 or (silence_run == 0 and since_partial >= partial_every):
+                            transcriber.submit(ring.view(utt_start, n_samples), n_samples)
+                            since_partial = 0
+                        if silence_run >= early_chunks_needed:
+                            hyp = transcriber.result_for(speech_end)
+                            if hyp is not None and hyp[1]:
+                                done = True
+                                break
+
+                    if silence_run >= silence_chunks_needed:
+                        done = True
+                        break
+
+                    if n_samples - utt_start >= max_samples:
+                        print(f"Answer cut off after {MAX_UTTERANCE_S:.0f} s")
+                        truncated = True
+                        speech_end = n_samples
+                        speech_end_t = tracing.tracer.clock()
+                        done = True
+                        break
+    finally:
+        if stream is not None:
+            stream.stop(); stream.close()
+
+    listen_stats.clear()
+    listen_stats.update(chunks=chunks, max_queue_depth=max_depth, vad_s=vad_time, truncated=truncated,
+                        speech_end_t=speech_end_t)
+    audio = ring.view(utt_start, n_samples)
+    transcript = None
+    if transcriber is not None:
+        # A decode covering all the speech was submitted at the first silent chunk; if the
+        # window held the whole answer, waiting for it beats starting a new full decode
+        if started and speech_end - speech_start <= (PARTIAL_WINDOW_S - 0.5) * SAMPLE_RATE:
+            hyp = transcriber.wait_for(speech_end, timeout=PARTIAL_WAIT_S)
+            transcript = hyp[0] if hyp is not None else None
+        transcriber.close()
+    return audio, transcript
+
+def trim_to_speech(samples_int16):
+    """
+    Offline counterpart of listen_for_answer's endpointing, for recordings on disk: runs the VAD
+    over the whole recording and returns the part listen_for_answer would have captured, from
+    PREROLL_MS before the first speech up to where SILENCE_MS of silence (or MAX_UTTERANCE_S)
+    ended the answer.
+
+    Returns:
+        np.ndarray: A view of samples_int16; empty if no speech was detected.
+    """
+    chunk_ms = 1000 * CHUNK_SAMPLES / SAMPLE_RATE
+    silence_chunks_needed = int(np.ceil(SILENCE_MS / chunk_ms))
+    preroll = int(PREROLL_MS * SAMPLE_RATE / 1000)
+    max_samples = int(MAX_UTTERANCE_S * SAMPLE_RATE)
+    usable = len(samples_int16) - len(samples_int16) % CHUNK_SAMPLES
+    audio = torch.from_numpy(samples_int16[:usable].astype(np.float32) / 32768.0)
+
+    vadmodel.reset_states()
+    start = None
+    silence_run = 0
+    with torch.no_grad():
+        for offset in range(0, usable, CHUNK_SAMPLES):
+            prob = vadmodel(audio[offset:offset + CHUNK_SAMPLES].unsqueeze(0), SAMPLE_RATE).item()
+            end = offset + CHUNK_SAMPLES
+            if start is None:
+                if prob < THRESH_START:
+                    continue
+                start = max(0, offset - preroll)
+            silence_run = silence_run + 1 if prob < THRESH_STOP else 0
+            if silence_run >= silence_chunks_needed or end - start >= max_samples:
+                return samples_int16[start:end]
+    return samples_int16[start:] if start is not None else samples_int16[:0]
+
 class QuestionType(Enum):
     # This enum class defines different types of questions that can be used in the application.
     """
@@ -109,6 +652,66 @@ def number_to_words(n):
     }
     return words.get(n, str(n))
 
+QUESTION_OBJECTS = ["apples", "oranges", "strawberries"]
+
+def format_question(question_type, number1, number2=None, chosen_object=None):
+    """
+    Builds the question text and answer for already chosen numbers (see generate_question).
+
+    Returns:
+        tuple: The question (str) and its answer (str).
+    """
+    if question_type == QuestionType.COUNTAFTER:
+        question = f"What is the number that comes after {number_to_words(number1)}?"
+        answer = number_to_words(number1 + 1)
+    elif question_type == QuestionType.GREATER:
+        question = f"What number is greater: {number_to_words(number1)}, or {number_to_words(number2)}?"
+        answer = number_to_words(max(number1, number2))
+    elif question_type == QuestionType.ADD:
+        question = f"What is {number_to_words(number1)}, plus {number_to_words(number2)}?"
+        answer = number_to_words(number1 + number2)
+    elif question_type == QuestionType.ADDOBJECTS:
+        question = f"What is {number_to_words(number1)} {chosen_object}, plus {number_to_words(number2)} {chosen_object}?"
+        answer = f"{number_to_words(number1 + number2)}"
+    return question, answer
+
+def all_questions():
+    """Every (question, answer) pair generate_question can produce."""
+    out = []
+    for number in range(1, 9):
+        out.append(format_question(QuestionType.COUNTAFTER, number))
+    for a in range(1, 10):
+        for b in range(1, 10):
+            if a != b:
+                out.append(format_question(QuestionType.GREATER, a, b))
+    for a in range(1, 9):
+        for b in range(1, 10 - a):
+            out.append(format_question(QuestionType.ADD, a, b))
+    for obj in QUESTION_OBJECTS:
+        for a in range(1, 9):
+            for b in range(1, 10 - a):
+                out.append(format_question(QuestionType.ADDOBJECTS, a, b, obj))
+    return out
+
+def incorrect_message(expected, said):
+    return f"Incorrect. The correct answer is {expected}. You said {said}."
+
+def all_phrases():
+    """
+    Every sentence the app is likely to say: all questions, "Correct!", and the
+    corrective message for each expected digit paired with each heard digit.
+    """
+    phrases = [question for question, _ in all_questions()]
+    phrases.append("Correct!")
+    phrases += [incorrect_message(expected, said) for expected in DIGIT_WORDS for said in DIGIT_WORDS
+                if expected != said]
+    return phrases
+
+# Pieces every sentence above is made of, for SegmentedSpeech
+SPEECH_FRAGMENTS = ["What is the number that comes after", "What number is greater", "or",
+                    "What is", "plus", "Incorrect", "The correct answer is", "You said", "Correct"]
+SPEECH_FRAGMENTS += list(DIGIT_WORDS) + QUESTION_OBJECTS
+
 def generate_question(question_type):
     """
     Generates a math-related question and its answer based on the specified question type.
@@ -129,26 +732,348 @@ def generate_question(question_type):
     """
     if question_type == QuestionType.COUNTAFTER:
         number = random.randint(1, 8)  # so number+1 <= 9
-        question = f"What is the number that comes after {number_to_words(number)}?"
-        answer = number_to_words(number + 1)
+        return format_question(question_type, number)
     elif question_type == QuestionType.GREATER:
         nums = random.sample(range(1, 10), 2)
-        question = f"What number is greater: {number_to_words(nums[0])}, or {number_to_words(nums[1])}?"
-        answer = number_to_words(max(nums))
+        return format_question(question_type, nums[0], nums[1])
     elif question_type == QuestionType.ADD:
         number1 = random.randint(1, 8)
         number2 = random.randint(1, 9 - number1)  # so sum <= 9
-        question = f"What is {number_to_words(number1)}, plus {number_to_words(number2)}?"
-        answer = number_to_words(number1 + number2)
+        return format_question(question_type, number1, number2)
     elif question_type == QuestionType.ADDOBJECTS:
-        objects = ["apples", "oranges", "strawberries"]
-        chosen_object = random.choice(objects)
+        chosen_object = random.choice(QUESTION_OBJECTS)
         number1 = random.randint(1, 8)
         number2 = random.randint(1, 9 - number1)  # so sum <= 9
-        question = f"What is {number_to_words(number1)} {chosen_object}, plus {number_to_words(number2)} {chosen_object}?"
-        total = number1 + number2
-        answer = f"{number_to_words(total)}"
-    return question, answer
+        return format_question(question_type, number1, number2, chosen_object)
+
+def render_speech(text):
+    """Synthesized audio for text, as say() would play it (see say)."""
+    return speech.get(text) if TTS_SEGMENTS else tts.get(text)
+
+def tts_settings():
+    """Everything render_speech's output depends on; prefetched audio is only reused under the same settings."""
+    return (ttsmodel_id, TTS_SPEAKER, TTS_SAMPLE_RATE, TTS_SEGMENTS, id(tts))
+
+def say(text, wait=False, play=True, audio=None):
+    """
+    Converts text to speech and plays it. Clips come from the phrase cache (see
+    tts_cache.PhraseCache), so a sentence that was already said or pre-synthesized at startup
+    plays without running Silero. With TTS_SEGMENTS, a sentence that isn't cached (e.g. feedback
+    repeating a misheard word) is stitched from cached fragments instead, and only unknown words
+    go through Silero.
+
+    Args:
+        text (str): The text to speak.
+        wait (bool, optional): If True, returns once playback finished.
+        play (bool, optional): If False, only synthesizes (headless runs without speakers).
+        audio (np.ndarray, optional): Already rendered speech for text (see QuestionPrefetcher).
+    """
+    if audio is None:
+        audio = render_speech(text)
+    if not play:
+        return
+    sd.play(audio, tts.sample_rate)
+    if wait:
+        sd.wait()
+
+def recognize_answer(samples_int16, transcript=None, recognizer=None):
+    """
+    Turns a recorded answer into a normalized digit word with recognizer ("whisper" or "digits",
+    default RECOGNIZER), reusing transcript when incremental decoding already covered the whole answer.
+    """
+    if (recognizer or RECOGNIZER) == "digits":
+        return recognize_digit(samples_int16)[0]
+    text = transcript if transcript is not None else transcribe_audio(samples_int16)
+    return normalize_answer(text)
+
+def is_correct(child_answer, expected):
+    """Compares a normalized answer (see recognize_answer) with a question's expected answer."""
+    return child_answer == expected.lower().replace(" ", "")
+
+class QuestionPrefetcher:
+    """
+    Prepares the next question while the current one is being answered: picks it and renders
+    its speech on a background thread, so the next round can start speaking right away.
+
+    Only one question is kept. It is tagged with the TTS settings it was rendered under and
+    thrown away (counted as stale) if they changed by the time it is taken; the round then
+    prepares its question as before and the next prefetch uses the new settings.
+    stats counts hits, misses, stale tickets and takes that had to wait for a prefetch in flight.
+
+    Args:
+        render (callable, optional): render(text) -> audio. Defaults to render_speech.
+        generate (callable, optional): generate() -> (question, expected). Defaults to a random
+            question type, as askQuestion always did.
+        settings (callable, optional): settings() -> hashable key of everything render depends on.
+            Defaults to tts_settings.
+    """
+    def __init__(self, render=None, generate=None, settings=None):
+        self.render = render or render_speech
+        self.generate = generate or (lambda: generate_question(QuestionType(random.randint(1, 4))))
+        self.settings = settings or tts_settings
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "waited": 0}
+        self._lock = threading.Lock()
+        self._ticket = None     # {"settings", "ready", "question", "expected", "audio", "error"}
+
+    def prefetch(self):
+        """Starts preparing a question unless one for the current settings is ready or in flight."""
+        key = self.settings()
+        with self._lock:
+            if self._ticket is not None and self._ticket["settings"] == key:
+                return
+            if self._ticket is not None:
+                self.stats["stale"] += 1
+            ticket = self._ticket = {"settings": key, "ready": threading.Event(), "error": None}
+        threading.Thread(target=self._fill, args=(ticket,), daemon=True).start()
+
+    def _fill(self, ticket):
+        try:
+            ticket["question"], ticket["expected"] = self.generate()
+            ticket["audio"] = self.render(ticket["question"])
+        except Exception as e:
+            ticket["error"] = e
+        finally:
+            ticket["ready"].set()
+
+    def take(self, timeout=PREFETCH_WAIT_S):
+        """
+        Hands over the prepared question, waiting up to timeout for one still being rendered.
+
+        Returns:
+            tuple: (question, expected, audio), or None on a miss (nothing prepared, stale
+            settings, failed or too slow), in which case the caller prepares its own.
+        """
+        with self._lock:
+            ticket, self._ticket = self._ticket, None
+            if ticket is not None and ticket["settings"] != self.settings():
+                self.stats["stale"] += 1
+                ticket = None
+            if ticket is not None and not ticket["ready"].is_set():
+                self.stats["waited"] += 1
+        if ticket is not None and not ticket["ready"].wait(timeout):
+            ticket = None
+        hit = ticket is not None and ticket["error"] is None
+        with self._lock:
+            self.stats["hits" if hit else "misses"] += 1
+        if not hit:
+            return None
+        return ticket["question"], ticket["expected"], ticket["audio"]
+
+class QuestionRound:
+    """
+    One question round as a pipeline of stages on a worker thread:
+    speak -> listen -> transcribe -> judge -> feedback -> react.
+
+    Nothing here touches Tk. Progress is published on self.events as (kind, value) tuples:
+    ("output", text) and ("status", text) for the labels, ("error", message) if a stage raised,
+    and ("done", result) last, where result holds the question, answer, verdict and the
+    per-stage timings in seconds (None after an error). The GUI drains the queue with
+    root.after (CarGUIApp._poll_round); run_headless reads the results directly.
+
+    With tracing on (TRACE_FILE), every stage is also recorded as a span under the round's trace
+    id (result["trace"]), which travels to the car with the reaction; collect_car_trace adds the
+    car's side afterwards.
+
+    When a prefetcher is given, the round takes its question from it and, once the question has
+    been spoken, starts preparing the next one while the child answers.
+
+    Args:
+        say (callable, optional): say(text, wait, audio=None) speaks. Defaults to say().
+        listen (callable, optional): listen(incremental) -> (samples_int16, transcript).
+            Defaults to listen_for_answer.
+        react (callable, optional): react(event, trace_id) sends "RIGHT" / "WRONG" to the car.
+            Defaults to send_reaction with CAR_TOKEN.
+        prefetcher (QuestionPrefetcher, optional): Source of ready-made questions.
+        render (callable, optional): render(text) -> audio for questions prepared here. Defaults to render_speech.
+    """
+    STAGES = ("prepare", "speak", "listen", "transcribe", "judge", "feedback", "react")
+
+    def __init__(self, say=say, listen=None, react=None, prefetcher=None, render=None, clock=time.perf_counter):
+        self.say = say
+        self.prefetcher = prefetcher
+        self.render = render or render_speech
+        self.listen = listen or (lambda incremental: listen_for_answer(incremental=incremental))
+        self.react = react or (lambda event, trace_id=None: send_reaction(event, token=CAR_TOKEN, trace_id=trace_id))
+        self.clock = clock
+        self.events = queue.Queue()
+        self._thread = None
+
+    def busy(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, question=None, expected=None):
+        """Runs a round on a worker thread. Returns False if one is still running."""
+        if self.busy():
+            return False
+        self._thread = threading.Thread(target=self.run, args=(question, expected), daemon=True)
+        self._thread.start()
+        return True
+
+    def run(self, question=None, expected=None):
+        """
+        Runs one round on the calling thread.
+
+        Args:
+            question (str, optional): Question to ask; a random one (with its answer) by default.
+            expected (str, optional): Expected answer for question.
+
+        Returns:
+            dict: The round's result, also published as ("done", result).
+        """
+        result = None
+        try:
+            result = self._run(question, expected)
+        except Exception as e:
+            self.events.put(("error", f"{e.__class__.__name__}: {e}"))
+        finally:
+            self.events.put(("done", result))
+        return result
+
+    def _run(self, question, expected):
+        timings = {}
+        t = self.clock()
+        trace_id = tracing.tracer.new_id()
+        wall = tracing.tracer.clock() if trace_id is not None else None
+
+        def stage_done(name):
+            nonlocal t, wall
+            now = self.clock()
+            timings[name] = now - t
+            t = now
+            if trace_id is not None:
+                now = tracing.tracer.clock()
+                tracing.tracer.add(trace_id, name, wall, now)
+                wall = now
+
+        # Prepare: time from the button press until the question's audio is ready
+        clip = None
+        if question is None and self.prefetcher is not None:
+            ready = self.prefetcher.take()
+            if ready is not None:
+                question, expected, clip = ready
+        if question is None:
+            question, expected = generate_question(QuestionType(random.randint(1, 4)))
+        if clip is None:
+            clip = self.render(question)
+        stage_done("prepare")
+
+        self.events.put(("output", question))
+        self.events.put(("status", "Speaking..."))
+        self.say(question, True, audio=clip)
+        stage_done("speak")
+        if self.prefetcher is not None:
+            self.prefetcher.prefetch()  # renders while the child answers
+
+        self.events.put(("status", "🎤 Listening..."))
+        audio, transcript = self.listen(INCREMENTAL_ASR and RECOGNIZER == "whisper")
+        if trace_id is not None and listen_stats.get("speech_end_t") is not None:
+            # Child stopped talking -> VAD (and early-exit decoding) decided the answer is over
+            tracing.tracer.add(trace_id, "endpointing", listen_stats["speech_end_t"], tracing.tracer.clock(), lane=1)
+        if ARCHIVE_RECORDINGS:
+            archive_recording(audio)
+        stage_done("listen")
+
+        self.events.put(("status", "Thinking…"))
+        child_answer = recognize_answer(audio, transcript)
+        stage_done("transcribe")
+
+        correct = is_correct(child_answer, expected)
+        msg = "Correct!" if correct else incorrect_message(expected, child_answer)
+        stage_done("judge")
+
+        feedback = self.render(msg)
+        stage_done("feedback")
+
+        self.say(msg, False, audio=feedback)
+        reply = self.react("RIGHT" if correct else "WRONG", trace_id=trace_id)
+        stage_done("react")
+        self.events.put(("output", msg))
+        self.events.put(("status", ""))
+        return {"question": question, "expected": expected, "answer": child_answer,
+                "correct": correct, "message": msg, "car": reply, "timings": timings, "trace": trace_id}
+
+def collect_car_trace(trace_id, car=True, path=None):
+    """
+    Finishes the trace of one round: fetches the car's timestamps for the reaction (waiting
+    until its first frame is out, the reaction may be queued behind another one), adds them to
+    tracing.tracer and writes the Chrome trace to path (default TRACE_FILE).
+
+    Runs on its own thread from the GUI; blocks for at least TRACE_FETCH_DELAY_S.
+    """
+    if trace_id is None:
+        return
+    if car:
+        conn = car_link.get_connection(CAR_HOST, CAR_PORT, token=CAR_TOKEN)
+        marks = None
+        for _ in range(TRACE_FETCH_TRIES):
+            time.sleep(TRACE_FETCH_DELAY_S)
+            marks = conn.trace_marks(trace_id)
+            if marks is None or "first_frame" in marks or "coalesced" in marks:
+                break
+        tracing.tracer.add_car_marks(trace_id, marks)
+    path = path or TRACE_FILE
+    if path:
+        tracing.tracer.export_chrome(path)
+
+def print_timeline(trace_id):
+    for offset, duration, process, name in tracing.tracer.timeline(trace_id):
+        print(f"  {offset * 1000:9.1f} ms  +{duration * 1000:8.1f} ms  {process:8s} {name}")
+
+def run_headless(rounds=1, answer_wav=None, car=True, prefetch=PREFETCH_NEXT):
+    """
+    Runs question rounds without Tk and prints each result with its stage timings.
+
+    Args:
+        rounds (int, optional): Number of rounds.
+        answer_wav (str, optional): Recording replayed as the child's answer every round; speech is
+            then synthesized but not played. If None, the microphone and speakers are used.
+        car (bool, optional): If False, reactions are not sent to the car.
+        prefetch (bool, optional): If True, the next question is prepared during each answer.
+
+    Returns:
+        list: The result dict of every round (None for a failed round).
+    """
+    load_models()
+    # Resolves the car off the reaction path (see car_link.CarMonitor), as the GUI does
+    monitor = car_link.CarMonitor(car_link.get_connection(CAR_HOST, CAR_PORT, token=CAR_TOKEN)).start() if car else None
+    listen = None
+    if answer_wav is not None:
+        samples = read_wav_int16(answer_wav)
+
+        def listen(incremental):
+            while not q.empty():
+                q.get_nowait()
+            feeder = replay_audio(samples)
+            try:
+                return listen_for_answer(open_stream=False, incremental=incremental)
+            finally:
+                feeder.join()
+
+    pipeline = QuestionRound(
+        say=(lambda text, wait, audio=None: say(text, wait, play=answer_wav is None, audio=audio)),
+        listen=listen,
+        react=None if car else (lambda event, trace_id=None: "SKIPPED"),
+        prefetcher=QuestionPrefetcher() if prefetch else None)
+    results = []
+    for _ in range(rounds):
+        result = pipeline.run()
+        while not pipeline.events.empty():
+            kind, value = pipeline.events.get_nowait()
+            if kind == "error":
+                print("error:", value)
+        results.append(result)
+        if result is not None:
+            stages = "  ".join(f"{name} {result['timings'][name] * 1000:7.1f} ms" for name in QuestionRound.STAGES)
+            print(f"{result['question']!r} -> {result['answer']!r} "
+                  f"({'correct' if result['correct'] else 'wrong'}, car: {result['car']})\n  {stages}")
+            if result["trace"] is not None:
+                collect_car_trace(result["trace"], car=car)
+                print_timeline(result["trace"])
+    if pipeline.prefetcher is not None:
+        print("prefetch", pipeline.prefetcher.stats)
+    if monitor is not None:
+        monitor.stop()
+    return results
 
 class CarGUIApp:
     def __init__(self, master):
@@ -219,6 +1144,21 @@ class CarGUIApp:
         self.fs = 44100
         self.seconds = 5
 
+        # Car connection: resolved once, kept alive and health-checked in the background
+        self._status_text = ""
+        self.car_monitor = car_link.CarMonitor(
+            car_link.get_connection(CAR_HOST, CAR_PORT, token=CAR_TOKEN)).start()
+        self._poll_car_status()
+
+        # Models load in the background (see load_models); the button waits for them
+        # Question rounds run on a worker thread and report back through a queue
+        self.prefetcher = QuestionPrefetcher() if PREFETCH_NEXT else None
+        self.round = QuestionRound(prefetcher=self.prefetcher)
+        self._poll_round()
+
+        self._disable_button(not models.ready())
+        self._poll_models()
+
     # UI helper methods (for readability)
     def _load_car_image(self, path, size=(240, 150)):
         # Loads a car image from the specified path, resizes it, and displays it in the car_label widget. 
@@ -262,9 +1202,35 @@ class CarGUIApp:
         Args:
             text (str): The status message to display.
         """
-        self.status_var.set(text)
+        self._status_text = text
+        self._render_status()
         self.master.update_idletasks()
 
+    def _render_status(self):
+        # Status label shows the current activity followed by the car's connection state
+        car = self.car_monitor.status_text()
+        self.status_var.set(f"{self._status_text}  ·  {car}" if self._status_text else car)
+
+    def _poll_car_status(self):
+        # The monitor runs on its own thread, so the label is refreshed from the Tk loop
+        self._render_status()
+        self.master.after(CAR_STATUS_POLL_MS, self._poll_car_status)
+
+    def _poll_models(self):
+        # Shows loading progress and enables the button once every model is ready
+        if not models.done():
+            self.set_status(models.status_text())
+            self.master.after(MODEL_POLL_MS, self._poll_models)
+            return
+        self.set_status("" if models.ready() else models.status_text())
+        if models.ready():
+            self._disable_button(False)
+            if self.prefetcher is not None:
+                self.prefetcher.prefetch()  # the first question, too
+        mark_startup("ready")
+        if STARTUP_TIMING:
+            print_startup_timings()
+
     def _disable_button(self, disabled=True):
         # Disables or enables the record button in the GUI.
         """
@@ -279,206 +1245,77 @@ class CarGUIApp:
         self.record_button.config(state=("disabled" if disabled else "normal"))
         self.master.update_idletasks()
     
-    def saySomething(self, text, wait=False):
-        # This function generates speech audio from text and plays it, optionally waiting for playback to finish.
-        """
-        Converts the given text to speech using a specified speaker and plays the audio.
-
-        Args:
-            text (str): The text to be converted to speech.
-            wait (bool, optional): If True, waits for the audio playback to finish before returning. Defaults to False.
-
-        Returns:
-            None
-        """
-        sample_rate = 48000
-        speaker = 'en_11'
-        put_accent=True
-        put_yo=True
-
-        audio = ttsmodel.apply_tts(text=text,
-                                   speaker=speaker,
-                                   sample_rate=sample_rate,
-                                   put_accent=put_accent,
-                                   put_yo=put_yo)
-        sd.play(audio, sample_rate)
-
-        if wait:
-            sd.wait()   
-
     def askQuestion(self):
         """
-        Generates a question, speaks it aloud, and initiates background listening for a user's response.
-
-        This function performs the following steps:
-        1. Generates a question and stores the expected answer.
-        2. Updates the UI to display the question and disables the relevant button.
-        3. Sets the status to indicate that the question is being spoken.
-        4. Speaks the question aloud, waiting for completion.
-        5. Starts a background thread to listen for and process the user's response, ensuring the UI remains responsive.
-        """
-        # Generate + speak question
-        question, self.expected_answer = generate_question(QuestionType(random.randint(1, 4)))
-        self.set_output(question)
-        self._disable_button(True)
-        self.set_status("Speaking...")
-        self.saySomething(question, wait=True)
-
-        # Start background thread so UI doesn't freeze while listening/transcribing
-        threading.Thread(target=self._listen_and_process, daemon=True).start()
-
-    def _listen_and_process(self):
-        # This function listens for audio input, processes the answer, and re-enables the button afterwards.
-        """
-        Listens for audio input until silence is detected, processes the received answer,
-        and ensures the associated button is re-enabled after processing.
-
-        The method performs the following steps:
-        1. Records audio input until silence is detected.
-        2. Processes the recorded answer.
-        3. Re-enables the button regardless of success or failure.
-        """
-        try:
-            self.recordUntilSilence()
-            self.processAnswer()
-        finally:
-            self._disable_button(False)
-
-    def recordUntilSilence(self):
-        # Records audio from the microphone until a period of silence is detected using voice activity detection (VAD).
-        """
-        Records audio input from the microphone until a specified duration of silence is detected, using the Silero voice activity detection (VAD) model.
-
-        The function:
-        - Initializes VAD and audio stream settings.
-        - Starts recording when speech is detected above a threshold.
-        - Continues recording until silence is detected for a specified duration.
-        - Saves the recorded audio to a WAV file.
-        - Updates the GUI status and output accordingly.
-
-        Returns:
-            None
-        """
-        # VAD settings
-        CHANNELS = 1
-        DTYPE = "int16"
-        CHUNK_SAMPLES = 512                 # 32 ms @ 16 kHz (required by Silero)
-        THRESH_START = 0.6
-        THRESH_STOP  = 0.5
-        SILENCE_MS   = 800
-
-        self.set_status("🎤 Listening...")
-        self.set_output(self.output_var.get())  # keep question visible
-
-        # Use current default input if possible
-        INPUT_DEVICE = sd.default.device[0] if isinstance(sd.default.device, (list, tuple)) else None
+        Starts a question round (see QuestionRound) unless one is already running.
 
-        stream = sd.InputStream(
-            samplerate=SAMPLE_RATE,
-            channels=CHANNELS,
-            dtype=DTYPE,
-            blocksize=CHUNK_SAMPLES,
-            device=INPUT_DEVICE,
-            callback=audio_cb,
-        )
-
-        started = False
-        silence_chunks_needed = int(np.ceil(SILENCE_MS / (1000 * CHUNK_SAMPLES / SAMPLE_RATE)))
-        silence_run = 0
-        collected = []
-
-        stream.start()
-        try:
-            while True:
-                chunk = q.get()
-                if chunk.ndim == 2:
-                    chunk = chunk[:, 0]
-
-                collected.append(chunk)
-
-                x = (torch.from_numpy(chunk.astype(np.float32)) / 32768.0).unsqueeze(0).to(device)
-                with torch.no_grad():
-                    prob = vadmodel(x, SAMPLE_RATE).item()
-
-                if not started and prob >= THRESH_START:
-                    started = True
-                    silence_run = 0
-
-                if started:
-                    if prob < THRESH_STOP:
-                        silence_run += 1
-                    else:
-                        silence_run = 0
-
-                    if silence_run >= silence_chunks_needed:
-                        break
-        finally:
-            stream.stop(); stream.close()
-
-        # Save the recording
-        audio = np.concatenate(collected, axis=0).astype(np.int16)
-        out_path = os.path.join(OUT_DIR, "recording.wav")
-        write_wav_int16(out_path, audio, SAMPLE_RATE)
-        self.set_status("Thinking…")
-
-    def processAnswer(self):
-        # Processes the child's spoken answer, normalizes it, compares it to the expected answer, and provides feedback.
-        """
-        Transcribes the child's spoken answer from an audio file, normalizes both the transcribed and expected answers
-        (by converting numbers to words, removing punctuation and spaces, and converting to lowercase), and compares them.
-        Provides feedback indicating whether the answer is correct or incorrect, and sends a corresponding reaction.
-        Steps:
-        1. Transcribes the audio file "recording/recording.wav" to text.
-        2. Normalizes the transcribed answer and the expected answer:
-            - Converts numbers (1–9) to words.
-            - Removes punctuation and spaces.
-            - Converts to lowercase.
-        3. Compares the normalized answers.
-        4. If correct, provides positive feedback and sends a "RIGHT" reaction.
-        5. If incorrect, provides corrective feedback with the correct answer and sends a "WRONG" reaction.
-        6. Updates output and status accordingly.
+        The round runs on a worker thread; its progress comes back through round.events and is
+        shown by _poll_round, so nothing here blocks the Tk event loop.
         """
-        # Transcribe
-        result = whisperModel.transcribe("recording/recording.wav", fp16=False)
-        childAnswer = result["text"]
-
-        # Normalize both sides to words 1–9, lowercase, no spaces
-        def num_to_word(match):
-            n = int(match.group())
-            return number_to_words(n)
-
-        childAnswer = childAnswer.translate(str.maketrans('', '', string.punctuation)).lower()
-        childAnswer = re.sub(r'\b\d+\b', num_to_word, childAnswer).replace(" ", "")
-
-        expected = self.expected_answer.lower().replace(" ", "")
-
-        if childAnswer == expected:
-            self.saySomething("Correct!")
-            send_reaction("RIGHT", token="monstercookiebrownie")
-            
-            
-            self.set_output("Correct!")
-            self.set_status("")
-        else:
-            msg = f"Incorrect. The correct answer is {self.expected_answer}. You said {childAnswer}."
-            
-            
-            self.saySomething(msg)
-            send_reaction("WRONG", token="monstercookiebrownie")
-            self.set_output(msg)
-            self.set_status("")
-
-# Print the current default input/output device indices for sounddevice
-print("Default input device:", sd.default.device)
-
-# Print a list of all available audio devices (input/output) for reference
-print("Available devices:")
-print(sd.query_devices())
-
-# Set the default input device to index 2 (output device remains unchanged)
-sd.default.device = (2, None)  # (input_device_index, output_device_index)
-
-# Run the Toy Car Buddy GUI application
-root = tk.Tk()           # Create the main Tkinter window
-app = CarGUIApp(root)    # Instantiate the CarGUIApp with the root window
-root.mainloop()          # Start the Tkinter event loop (shows the GUI)
\ No newline at end of file
+        if self.round.start():
+            self._disable_button(True)
+
+    def _poll_round(self):
+        # Applies the worker's progress to the widgets; the only place round events touch Tk
+        while True:
+            try:
+                kind, value = self.round.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "output":
+                self.set_output(value)
+            elif kind == "status":
+                self.set_status(value)
+            elif kind == "error":
+                print("Question round failed:", value)
+                self.set_status("Something went wrong, try again")
+            elif kind == "done":
+                self._disable_button(False)
+                if value is not None and value["trace"] is not None:
+                    threading.Thread(target=collect_car_trace, args=(value["trace"],), daemon=True).start()
+        self.master.after(PIPELINE_POLL_MS, self._poll_round)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Toy Car Buddy")
+    parser.add_argument("--startup-timing", action="store_true", help="print per-phase startup timings")
+    parser.add_argument("--headless", type=int, metavar="ROUNDS",
+                        help="run ROUNDS question rounds without the GUI and print stage timings")
+    parser.add_argument("--answer", metavar="WAV", help="with --headless: replay WAV as every answer")
+    parser.add_argument("--no-car", action="store_true", help="with --headless: don't send reactions")
+    parser.add_argument("--no-prefetch", action="store_true", help="with --headless: don't prefetch questions")
+    parser.add_argument("--trace", metavar="FILE", help="trace every round on both agents into a Chrome trace JSON")
+    args = parser.parse_args()
+    STARTUP_TIMING = STARTUP_TIMING or args.startup_timing
+    TRACE_FILE = args.trace or TRACE_FILE
+    tracing.tracer.enabled = TRACE_FILE is not None
+    mark_startup("imports")
+
+    if args.headless:
+        run_headless(args.headless, answer_wav=args.answer, car=not args.no_car, prefetch=not args.no_prefetch)
+        raise SystemExit
+
+    # Fill the TTS disk cache in the background once the TTS model is in; phrases not ready yet
+    # are synthesized on demand
+    def on_model_loaded(name):
+        if name == "tts" and TTS_WARMUP:
+            tts.warm_up(speech.fragment_texts() + all_phrases(), workers=TTS_WORKERS,
+                        on_done=lambda n: print(f"TTS warm-up done ({n} new clips)"))
+    models.start(on_loaded=on_model_loaded)
+    mark_startup("models started")
+
+    # Print the current default input/output device indices for sounddevice
+    print("Default input device:", sd.default.device)
+
+    # Print a list of all available audio devices (input/output) for reference
+    print("Available devices:")
+    print(sd.query_devices())
+
+    # Set the default input device to index 2 (output device remains unchanged)
+    sd.default.device = (2, None)  # (input_device_index, output_device_index)
+
+    # Run the Toy Car Buddy GUI application
+    root = tk.Tk()           # Create the main Tkinter window
+    app = CarGUIApp(root)    # Instantiate the CarGUIApp with the root window
+    root.after_idle(mark_startup, "window shown")
+    root.mainloop()          # Start the Tkinter event loop (shows the GUI)
\ No newline at end of file
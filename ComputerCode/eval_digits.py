@@ -0,0 +1,151 @@
+# Accuracy and latency of the answer pipeline over labeled recordings, no
+# microphone or car needed. Every answer goes through what a question round
+# does after the child speaks: VAD endpointing (trim_to_speech), recognition
+# and the correct/incorrect check, spread over a pool of worker processes.
+#
+# Recordings (mono 16-bit 16 kHz WAV) come from a folder, labeled by their
+# folder or the start of their file name, e.g.  answers/five/kid3.wav  or
+# answers/five_kid3.wav,  or from a CSV manifest of  path,expected  lines
+# (paths relative to the manifest; "5" and "five" both work).
+#
+# Usage:  python ComputerCode/eval_digits.py answers/ [--recognizer whisper|digits|both]
+#             [--workers N] [--no-vad] [--out results.csv]
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import computer_agent as ca
+
+RECOGNIZERS = ("whisper", "digits")
+OTHER = "other"     # confusion-matrix column for anything that isn't a digit word
+
+def label_for(path):
+    for part in (re.split(r"[_\-. ]", os.path.basename(path))[0], os.path.basename(os.path.dirname(path))):
+        label = ca.normalize_answer(part)
+        if label in ca.DIGIT_WORDS:
+            return label
+    return None
+
+def find_wavs(folder):
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            if name.lower().endswith(".wav"):
+                yield os.path.join(root, name)
+
+def read_manifest(path):
+    base = os.path.dirname(os.path.abspath(path))
+    items = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or row[0].strip().lower() in ("path", "") or row[0].lstrip().startswith("#"):
+                continue
+            wav = os.path.join(base, row[0].strip())
+            items.append((wav, ca.normalize_answer(row[1])))
+    return items
+
+def collect(source):
+    """[(wav path, expected digit word)] from a folder or manifest."""
+    if os.path.isfile(source):
+        return read_manifest(source)
+    items = []
+    for path in find_wavs(source):
+        label = label_for(path)
+        if label is None:
+            print(f"skipping {path}: no digit label")
+            continue
+        items.append((path, label))
+    return items
+
+# ======== WORKERS ========
+def init_worker(recognizers, vad):
+    names = ["whisper"]
+    if vad:
+        names.append("vad")
+    ca.load_models(names)
+    for recognizer in recognizers:
+        ca.recognize_answer(np.zeros(ca.SAMPLE_RATE, dtype=np.int16), recognizer=recognizer)  # warm up
+
+def evaluate_one(path, expected, recognizers, vad):
+    """Runs one recording through endpointing and every recognizer; returns one result per recognizer."""
+    samples = ca.read_wav_int16(path)
+    t = time.perf_counter()
+    if vad:
+        samples = ca.trim_to_speech(samples)
+    trim_ms = (time.perf_counter() - t) * 1000
+    results = []
+    for recognizer in recognizers:
+        t = time.perf_counter()
+        answer = ca.recognize_answer(samples, recognizer=recognizer) if len(samples) else ""
+        recognize_ms = (time.perf_counter() - t) * 1000
+        results.append({"path": path, "recognizer": recognizer, "expected": expected, "answer": answer,
+                        "correct": ca.is_correct(answer, expected), "trim_ms": trim_ms,
+                        "recognize_ms": recognize_ms, "latency_ms": trim_ms + recognize_ms})
+    return results
+
+def run_all(items, recognizers, vad, workers):
+    if workers <= 0:
+        init_worker(recognizers, vad)
+        return [r for path, expected in items for r in evaluate_one(path, expected, recognizers, vad)]
+    ctx = mp.get_context("spawn")   # workers load their own models; never fork torch threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=init_worker, initargs=(recognizers, vad)) as pool:
+        futures = [pool.submit(evaluate_one, path, expected, recognizers, vad) for path, expected in items]
+        return [r for f in futures for r in f.result()]
+
+# ======== REPORT ========
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+def print_report(recognizer, results):
+    correct = sum(r["correct"] for r in results)
+    lat = sorted(r["latency_ms"] for r in results)
+    print(f"\n== {recognizer} ==")
+    print(f"accuracy {correct}/{len(results)} ({100.0 * correct / len(results):.1f}%)")
+    print("latency ms  " + "  ".join(f"p{p} {percentile(lat, p):.0f}" for p in (50, 90, 99))
+          + f"  max {lat[-1]:.0f}   (VAD trim median {sorted(r['trim_ms'] for r in results)[len(results) // 2]:.0f})")
+
+    columns = list(ca.DIGIT_WORDS) + [OTHER]
+    counts = {(e, a): 0 for e in ca.DIGIT_WORDS for a in columns}
+    for r in results:
+        if r["expected"] in ca.DIGIT_WORDS:
+            counts[(r["expected"], r["answer"] if r["answer"] in ca.DIGIT_WORDS else OTHER)] += 1
+    print("confusion (rows expected, columns heard)")
+    print(" " * 7 + "".join(f"{c[:5]:>6s}" for c in columns))
+    for e in ca.DIGIT_WORDS:
+        print(f"{e:7s}" + "".join(f"{counts[(e, a)] or '.':>6}" for a in columns))
+
+def write_csv(path, results):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate answer recognition on labeled recordings")
+    parser.add_argument("source", help="folder of labeled WAVs or CSV manifest (path,expected)")
+    parser.add_argument("--recognizer", choices=RECOGNIZERS + ("both",), default="both")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="worker processes (0 = run in this process)")
+    parser.add_argument("--no-vad", action="store_true", help="recognize whole recordings without VAD trimming")
+    parser.add_argument("--out", help="write per-recording results to this CSV")
+    args = parser.parse_args()
+
+    items = collect(args.source)
+    if not items:
+        sys.exit("no labeled WAV files found")
+    recognizers = RECOGNIZERS if args.recognizer == "both" else (args.recognizer,)
+    t = time.perf_counter()
+    results = run_all(items, recognizers, not args.no_vad, args.workers)
+    print(f"{len(items)} recordings, {args.workers} workers, {time.perf_counter() - t:.1f} s")
+    for recognizer in recognizers:
+        print_report(recognizer, [r for r in results if r["recognizer"] == recognizer])
+    if args.out:
+        write_csv(args.out, results)
+
+if __name__ == "__main__":
+    main()
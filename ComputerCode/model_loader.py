@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+
+import torch
+
+# Pinned local copies of the torch hub repos. torch.hub keeps a clone of every
+# repo it has loaded under get_dir(); loading from that clone with
+# source="local" skips the GitHub lookup torch.hub otherwise does on each start.
+HUB_DIR = torch.hub.get_dir()
+SILERO_TTS_DIR = os.path.join(HUB_DIR, "snakers4_silero-models_master")
+SILERO_VAD_DIR = os.path.join(HUB_DIR, "snakers4_silero-vad_master")
+
+def hub_load(repo, model, local_dir=None, **kwargs):
+    """
+    torch.hub.load from local_dir if that clone exists, else from GitHub
+    (which also creates the clone for next time).
+    """
+    if local_dir and os.path.isdir(local_dir):
+        return torch.hub.load(local_dir, model, source="local", **kwargs)
+    return torch.hub.load(repo, model, trust_repo=True, **kwargs)
+
+class ModelLoader:
+    """
+    Loads models concurrently, one background thread each, so the window can
+    come up first and features can be enabled as their models become ready.
+
+    Args:
+        loaders (dict): name -> function that loads the model and stores it where it is used.
+        clock (callable, optional): Time source for the per-model timings.
+    """
+    def __init__(self, loaders, clock=time.perf_counter):
+        self.loaders = dict(loaders)
+        self._clock = clock
+        self._done = {name: threading.Event() for name in self.loaders}
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._t0 = None
+        self.errors = {}        # name -> exception
+        self.timings = {}       # name -> (start, end) in seconds since the first start()
+
+    def _names(self, names):
+        return list(self.loaders) if names is None else list(names)
+
+    def start(self, names=None, on_loaded=None):
+        """
+        Starts loading every model in names (default: all) that isn't loading yet.
+
+        Args:
+            on_loaded (callable, optional): on_loaded(name) called from the loader thread once a model is ready.
+        """
+        with self._lock:
+            if self._t0 is None:
+                self._t0 = self._clock()
+            for name in self._names(names):
+                if name not in self._threads:
+                    t = threading.Thread(target=self._run, args=(name, on_loaded), daemon=True,
+                                         name=f"load-{name}")
+                    self._threads[name] = t
+                    t.start()
+        return self
+
+    def _run(self, name, on_loaded):
+        start = self._clock() - self._t0
+        try:
+            self.loaders[name]()
+        except Exception as e:
+            self.errors[name] = e
+        self.timings[name] = (start, self._clock() - self._t0)
+        self._done[name].set()
+        if on_loaded is not None and name not in self.errors:
+            on_loaded(name)
+
+    def done(self, names=None):
+        """True once every model in names finished loading, successfully or not."""
+        return all(self._done[name].is_set() for name in self._names(names))
+
+    def ready(self, names=None):
+        return self.done(names) and not any(name in self.errors for name in self._names(names))
+
+    def wait(self, names=None, timeout=None):
+        """
+        Blocks until every model in names is loaded.
+
+        Raises:
+            RuntimeError: If a model failed to load.
+            TimeoutError: If timeout passed first.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        for name in self._names(names):
+            remaining = None if deadline is None else max(0.0, deadline - self._clock())
+            if not self._done[name].wait(remaining):
+                raise TimeoutError(f"{name} is still loading")
+            if name in self.errors:
+                raise RuntimeError(f"Loading {name} failed: {self.errors[name]}") from self.errors[name]
+
+    def status_text(self, names=None):
+        """Short progress description for the GUI status label."""
+        names = self._names(names)
+        failed = [name for name in names if name in self.errors]
+        if failed:
+            return f"Could not load {', '.join(failed)}"
+        pending = [name for name in names if not self._done[name].is_set()]
+        if not pending:
+            return "Models ready"
+        return f"Loading models {len(names) - len(pending)}/{len(names)} ({', '.join(pending)})..."
@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+
+# Span tracing of one question round across both agents. Every round gets a
+# trace id; the computer records its stages as spans, the id travels to the
+# car with the reaction command (see car_link.traced), and the car's own
+# timestamps are fetched back afterwards with the TRACE command and shifted
+# onto the computer's clock. Everything is kept in memory and can be written
+# as Chrome trace JSON (chrome://tracing or https://ui.perfetto.dev).
+#
+# With tracing disabled new_id() returns None and every call below returns
+# right away, so the instrumentation costs an attribute check per stage.
+
+COMPUTER, CAR = "computer", "car"
+_PIDS = {COMPUTER: 1, CAR: 2}
+
+# Car marks (car_agent.TraceMarks) and the span each pair of them becomes
+CAR_SPANS = (
+    ("sent", "recv", "network", 0),
+    ("recv", "parsed", "parse", 0),
+    ("parsed", "enqueue", "dispatch", 0),
+    ("enqueue", "dequeue", "queue wait", 0),
+    ("dequeue", "first_frame", "to first frame", 0),
+    ("dequeue", "first_motor", "to first motor", 1),
+)
+
+class Tracer:
+    """
+    Collects spans (trace id, name, start, end) per interaction.
+
+    Args:
+        enabled (bool, optional): Record anything at all.
+        clock (callable, optional): Wall clock in seconds; the car reports time.time() too.
+    """
+    def __init__(self, enabled=False, clock=time.time):
+        self.enabled = enabled
+        self.clock = clock
+        self._spans = []    # [(trace_id, name, start, end, process, lane)]
+        self._marks = {}    # trace_id -> {name: t} (computer side, e.g. "sent")
+        self._lock = threading.Lock()
+
+    def new_id(self):
+        return os.urandom(4).hex() if self.enabled else None
+
+    def add(self, trace_id, name, start, end, process=COMPUTER, lane=0):
+        if trace_id is None:
+            return
+        with self._lock:
+            self._spans.append((trace_id, name, start, end, process, lane))
+
+    def mark(self, trace_id, name, t=None):
+        if trace_id is None:
+            return
+        with self._lock:
+            self._marks.setdefault(trace_id, {})[name] = self.clock() if t is None else t
+
+    def add_car_marks(self, trace_id, marks):
+        """
+        Turns the car's timestamps (already on this clock, see CarConnection.trace_marks)
+        into spans: network, parse, dispatch, queue wait, and time to first frame / motor.
+        """
+        if trace_id is None or not marks:
+            return
+        with self._lock:
+            marks = dict(marks, **{k: v for k, v in self._marks.get(trace_id, {}).items() if k not in marks})
+        for start, end, name, lane in CAR_SPANS:
+            if start in marks and end in marks:
+                self.add(trace_id, name, marks[start], marks[end], CAR, lane)
+
+    def timeline(self, trace_id):
+        """Spans of one interaction as [(offset_s, duration_s, process, name)] in start order."""
+        with self._lock:
+            spans = sorted((s for s in self._spans if s[0] == trace_id), key=lambda s: s[2])
+        if not spans:
+            return []
+        t0 = spans[0][2]
+        return [(start - t0, end - start, process, name) for _, name, start, end, process, _ in spans]
+
+    def chrome_events(self):
+        """Chrome trace events: one thread row per interaction and lane, one process per agent."""
+        with self._lock:
+            spans = list(self._spans)
+        rows = {trace_id: i for i, trace_id in enumerate(dict.fromkeys(s[0] for s in spans))}
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": process}}
+                  for process, pid in _PIDS.items()]
+        for trace_id, name, start, end, process, lane in spans:
+            events.append({"name": name, "cat": process, "ph": "X",
+                           "ts": start * 1e6, "dur": max(0.0, end - start) * 1e6,
+                           "pid": _PIDS[process], "tid": rows[trace_id] * 10 + lane,
+                           "args": {"trace": trace_id}})
+        return events
+
+    def export_chrome(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"traceEvents": self.chrome_events(), "displayTimeUnit": "ms"}, f)
+        os.replace(tmp, path)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self._marks.clear()
+
+tracer = Tracer()
@@ -0,0 +1,334 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+
+import numpy as np
+import torch
+from model_loader import hub_load, SILERO_TTS_DIR
+
+CACHE_VERSION = 2           # bump to invalidate every cached clip
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_cache")
+MAX_ITEMS = 64              # clips kept in memory (a 3 s clip at 48 kHz is ~0.6 MB)
+CROSSFADE_MS = 15           # overlap between stitched fragments
+TRIM_THRESHOLD = 0.01       # |sample| below this counts as silence at a fragment's edges
+TRIM_MARGIN_MS = 10         # silence kept on each side of a trimmed fragment
+PAUSE_MS = {",": 120, ":": 120, ";": 120, ".": 260, "?": 260, "!": 260}
+
+def load_model(language="en", model_id="v3_en", device="cpu", repo_dir=SILERO_TTS_DIR):
+    """Loads the Silero TTS model, from the local clone repo_dir when there is one."""
+    model, _ = hub_load('snakers4/silero-models', 'silero_tts', local_dir=repo_dir,
+                        language=language,
+                        speaker=model_id)
+    model.to(torch.device(device))
+    return model
+
+def synthesize(model, text, speaker, sample_rate, put_accent=True, put_yo=True):
+    """Runs Silero on text and returns float32 samples."""
+    audio = model.apply_tts(text=text,
+                            speaker=speaker,
+                            sample_rate=sample_rate,
+                            put_accent=put_accent,
+                            put_yo=put_yo)
+    return np.asarray(audio, dtype=np.float32)
+
+def _save(path, audio):
+    # Clips are stored as int16, half the size of float32 and plenty for speech
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, np.round(np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16))
+    os.replace(tmp, path)
+
+def _load(path):
+    return np.load(path).astype(np.float32) / 32767.0
+
+# ======== WARM-UP WORKERS ========
+# Each worker process loads its own copy of the model once, then writes
+# clips straight to the disk cache; the GUI process only ever reads them.
+_worker_model = None
+
+def _worker_init(language, model_id, repo_dir):
+    global _worker_model
+    torch.set_num_threads(1)
+    _worker_model = load_model(language, model_id, repo_dir=repo_dir)
+
+def _worker_synth(text, speaker, sample_rate, put_accent, put_yo, path):
+    _save(path, synthesize(_worker_model, text, speaker, sample_rate, put_accent, put_yo))
+    return path
+
+class PhraseCache:
+    """
+    Synthesized speech keyed by (text, speaker, sample rate, model version).
+
+    Clips are looked up in a small in-memory LRU first, then in cache_dir on
+    disk (one int16 .npy per clip), and only synthesized when both miss. Since the
+    app speaks from a small fixed set of sentences, warm_up() can fill the
+    disk cache ahead of time so the first question plays without waiting for
+    Silero.
+
+    Args:
+        model: Loaded Silero TTS model, used on a cache miss.
+        model_id (str): Model version (e.g. "v3_en"); part of the cache key.
+        speaker (str): Silero speaker.
+        sample_rate (int): Output sample rate.
+        language (str, optional): Model language, used by warm-up workers to load their own model.
+        cache_dir (str, optional): Directory of the disk cache. None disables it.
+        max_items (int, optional): Clips kept in memory.
+        repo_dir (str, optional): Local Silero clone the warm-up workers load from.
+    """
+    def __init__(self, model, model_id, speaker, sample_rate, language="en",
+                 cache_dir=CACHE_DIR, max_items=MAX_ITEMS, put_accent=True, put_yo=True,
+                 repo_dir=SILERO_TTS_DIR):
+        self.model = model
+        self.model_id = model_id
+        self.speaker = speaker
+        self.sample_rate = sample_rate
+        self.language = language
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.put_accent = put_accent
+        self.put_yo = put_yo
+        self.repo_dir = repo_dir
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self._clips = OrderedDict()
+        self._lock = threading.Lock()
+        self._synth_lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, text):
+        raw = json.dumps([CACHE_VERSION, self.model_id, self.speaker, self.sample_rate,
+                          self.put_accent, self.put_yo, text])
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def path(self, text):
+        return os.path.join(self.cache_dir, self.key(text) + ".npy") if self.cache_dir else None
+
+    def _remember(self, key, audio):
+        with self._lock:
+            self._clips[key] = audio
+            self._clips.move_to_end(key)
+            while len(self._clips) > self.max_items:
+                self._clips.popitem(last=False)
+
+    def get(self, text):
+        """
+        Returns the float32 clip for text, synthesizing it only if it is in
+        neither the memory nor the disk cache.
+        """
+        key = self.key(text)
+        with self._lock:
+            audio = self._clips.get(key)
+            if audio is not None:
+                self._clips.move_to_end(key)
+                self.stats["hits"] += 1
+                return audio
+
+        path = self.path(text)
+        if path and os.path.exists(path):
+            try:
+                audio = _load(path)
+            except (OSError, ValueError):
+                audio = None    # half-written or corrupt; synthesize again
+            if audio is not None:
+                self.stats["disk_hits"] += 1
+                self._remember(key, audio)
+                return audio
+
+        self.stats["misses"] += 1
+        with self._synth_lock:
+            audio = synthesize(self.model, text, self.speaker, self.sample_rate, self.put_accent, self.put_yo)
+        if path:
+            try:
+                _save(path, audio)
+            except OSError:
+                pass
+        self._remember(key, audio)
+        return audio
+
+    def cached(self, text):
+        """True if text is in memory or on disk, i.e. get() would not run Silero."""
+        with self._lock:
+            if self.key(text) in self._clips:
+                return True
+        path = self.path(text)
+        return bool(path) and os.path.exists(path)
+
+    def missing(self, texts):
+        """Texts (deduplicated, in order) without a clip on disk."""
+        seen = set()
+        out = []
+        for text in texts:
+            if text not in seen and not os.path.exists(self.path(text)):
+                seen.add(text)
+                out.append(text)
+        return out
+
+    def warm_up(self, texts, workers=2, background=True, on_done=None):
+        """
+        Synthesizes every text not yet on disk in a pool of worker processes.
+
+        Args:
+            texts (iterable): Phrases to pre-synthesize.
+            workers (int, optional): Worker processes, each loading its own model.
+            background (bool, optional): If True, returns immediately and runs in a daemon thread.
+            on_done (callable, optional): on_done(count) called once every clip is written.
+
+        Returns:
+            threading.Thread or int: The warm-up thread, or the number of clips written.
+        """
+        if not self.cache_dir:
+            raise ValueError("warm_up needs a disk cache")
+        todo = self.missing(texts)
+
+        def run():
+            written = 0
+            if todo:
+                ctx = mp.get_context("spawn")   # never fork a process that holds torch threads
+                with ProcessPoolExecutor(max_workers=max(1, min(workers, len(todo))), mp_context=ctx,
+                                         initializer=_worker_init,
+                                         initargs=(self.language, self.model_id, self.repo_dir)) as pool:
+                    futures = [pool.submit(_worker_synth, text, self.speaker, self.sample_rate,
+                                           self.put_accent, self.put_yo, self.path(text))
+                               for text in todo]
+                    for f in futures:
+                        try:
+                            f.result()
+                            written += 1
+                        except Exception as e:
+                            print("TTS warm-up failed:", e)
+            if on_done is not None:
+                on_done(written)
+            return written
+
+        if not background:
+            return run()
+        t = threading.Thread(target=run, daemon=True)
+        t.start()
+        return t
+
+# ======== SEGMENTED SPEECH ========
+_TOKEN = re.compile(r"[\w']+|[^\w\s]")
+
+def trim_silence(audio, sample_rate, threshold=TRIM_THRESHOLD, margin_ms=TRIM_MARGIN_MS):
+    """Cuts leading and trailing silence, keeping margin_ms on each side."""
+    loud = np.flatnonzero(np.abs(audio) >= threshold)
+    if len(loud) == 0:
+        return audio[:0]
+    margin = int(sample_rate * margin_ms / 1000)
+    return audio[max(0, loud[0] - margin):loud[-1] + 1 + margin]
+
+def crossfade_concat(parts, sample_rate, crossfade_ms=CROSSFADE_MS):
+    """
+    Joins float32 clips, overlapping each pair by up to crossfade_ms with a
+    linear fade. The result is sum(len(part)) minus the overlaps long.
+    """
+    n = int(sample_rate * crossfade_ms / 1000)
+    overlaps = [min(n, len(prev), len(cur)) for prev, cur in zip(parts, parts[1:])]
+    out = np.zeros(sum(len(p) for p in parts) - sum(overlaps), dtype=np.float32)
+    pos = 0
+    for i, part in enumerate(parts):
+        k = overlaps[i - 1] if i else 0
+        if k:
+            fade = np.linspace(0.0, 1.0, k, endpoint=False, dtype=np.float32)
+            out[pos - k:pos] = out[pos - k:pos] * (1.0 - fade) + part[:k] * fade
+        out[pos:pos + len(part) - k] = part[k:]
+        pos += len(part) - k
+    return out
+
+class SegmentedSpeech:
+    """
+    Speaks a sentence by stitching cached clips of its fragments.
+
+    The text is split into the longest known fragments (template phrases,
+    number words, object names); runs of unknown words become fragments of
+    their own and go through Silero once (then they are cached like any other
+    clip). Punctuation turns into a short pause. A sentence that is already in
+    the phrase cache as a whole is played as is, since it sounds more natural.
+
+    Args:
+        cache (PhraseCache): Where fragment clips come from.
+        fragments (iterable): Known fragments, e.g. "The correct answer is" or "seven".
+        crossfade_ms (int, optional): Overlap between neighbouring fragments.
+    """
+    def __init__(self, cache, fragments, crossfade_ms=CROSSFADE_MS):
+        self.cache = cache
+        self.crossfade_ms = crossfade_ms
+        self._fragments = {}    # lowercased word tuple -> fragment text
+        for fragment in fragments:
+            words = tuple(w.lower() for w in _TOKEN.findall(fragment) if w not in PAUSE_MS)
+            if words:
+                self._fragments[words] = " ".join(words)
+        self._longest = max((len(w) for w in self._fragments), default=0)
+        self._trimmed = {}      # fragment text -> trimmed clip
+
+    def fragment_texts(self):
+        """Fragment texts to pre-synthesize (see PhraseCache.warm_up)."""
+        return list(self._fragments.values())
+
+    def split(self, text):
+        """
+        Returns [(kind, value)] where kind is "known" or "unknown" (value is the
+        fragment text) or "pause" (value is milliseconds).
+        """
+        tokens = _TOKEN.findall(text)
+        out = []
+        unknown = []
+
+        def flush():
+            if unknown:
+                out.append(("unknown", " ".join(unknown)))
+                unknown.clear()
+
+        i = 0
+        while i < len(tokens):
+            if tokens[i] in PAUSE_MS:
+                flush()
+                out.append(("pause", PAUSE_MS[tokens[i]]))
+                i += 1
+                continue
+            for n in range(min(self._longest, len(tokens) - i), 0, -1):
+                words = tuple(t.lower() for t in tokens[i:i + n])
+                if words in self._fragments:
+                    flush()
+                    out.append(("known", self._fragments[words]))
+                    i += n
+                    break
+            else:
+                unknown.append(tokens[i])
+                i += 1
+        flush()
+        while out and out[-1][0] == "pause":
+            out.pop()           # no trailing silence
+        return out
+
+    def _clip(self, fragment):
+        clip = self._trimmed.get(fragment)
+        if clip is None:
+            clip = trim_silence(self.cache.get(fragment), self.cache.sample_rate)
+            if len(self._trimmed) < 4 * self.cache.max_items:
+                self._trimmed[fragment] = clip
+        return clip
+
+    def get(self, text):
+        """Returns float32 samples for text at the cache's sample rate."""
+        if self.cache.cached(text):
+            return self.cache.get(text)
+        return self.stitch(text)
+
+    def stitch(self, text):
+        """Assembles text from fragment clips, even if the whole sentence is cached."""
+        sr = self.cache.sample_rate
+        parts = []
+        for kind, value in self.split(text):
+            if kind == "pause":
+                parts.append(np.zeros(int(sr * value / 1000), dtype=np.float32))
+            else:
+                parts.append(self._clip(value))
+        if not parts:
+            return np.zeros(0, dtype=np.float32)
+        return crossfade_concat(parts, sr, self.crossfade_ms)